@@ -0,0 +1,131 @@
+import math
+import threading
+
+# Limites do lote de envio ao Solr (documentos por /update)
+LOTE_MIN = 100
+LOTE_MAX = 10000
+LATENCIA_ALVO = 5.0    # segundos por envio, bem abaixo do timeout de 60s
+BYTES_MAX = 8 << 20    # corpo máximo de um envio (~8 MiB)
+JANELA = 4             # envios observados antes de cada ajuste
+OCIOSO_MAX = 0.2       # acima disso o envio espera a análise e não adianta crescer o lote
+
+# Limites das tarefas de análise (textos por tarefa do pool de lematização)
+TAREFA_MIN = 8
+TAREFA_MAX = 1000
+DURACAO_TAREFA = 0.5   # segundos por tarefa: amortiza o IPC sem desbalancear os processos
+
+
+def bytes_estimados(lote):
+    # Aproximação barata do corpo JSON: tamanho dos campos de texto + chaves e aspas
+    return sum(len(v) if isinstance(v, str) else 16 for doc in lote for v in doc.values()) + 24 * len(lote)
+
+
+# ---- Tamanho do lote de envio ----
+class ControladorEnvio:
+    # MIMD: o lote cresce por um fator (passo) enquanto o envio é o gargalo e a latência e o
+    # corpo ficam dentro dos limites; cai pela metade ao passar do alvo ou falhar.
+    # O crescimento multiplicativo é limitado pela vazão medida (latência alvo × docs/s).
+    # A instância é chamável e serve direto como batch_size de carregar_lotes.
+    def __init__(self, inicial, minimo=LOTE_MIN, maximo=LOTE_MAX, latencia_alvo=LATENCIA_ALVO,
+                 bytes_max=BYTES_MAX, janela=JANELA, passo=1.25, rotulo="ajuste"):
+        self.minimo, self.maximo = minimo, maximo
+        self.tamanho = self._limitar(inicial)
+        self.latencia_alvo = latencia_alvo
+        self.bytes_max = bytes_max
+        self.janela = janela
+        self.passo = passo
+        self.rotulo = rotulo
+        self._observacoes = []  # (docs, bytes, segundos, espera)
+        self._falhas = 0
+        self._trava = threading.Lock()
+
+    def __call__(self):
+        return self.tamanho
+
+    def _limitar(self, tamanho):
+        return max(self.minimo, min(self.maximo, int(tamanho)))
+
+    def observar(self, lote, segundos, espera=0.0):
+        # 'espera': tempo que a thread de envio ficou parada aguardando este lote
+        with self._trava:
+            self._observacoes.append((len(lote), bytes_estimados(lote), segundos, espera))
+            if len(self._observacoes) >= self.janela:
+                self._ajustar()
+
+    def falhou(self):
+        with self._trava:
+            self._falhas += 1
+            self._ajustar()
+
+    def _ajustar(self):
+        obs, self._observacoes = self._observacoes, []
+        falhas, self._falhas = self._falhas, 0
+        docs = sum(o[0] for o in obs)
+        segundos = sum(o[2] for o in obs)
+        espera = sum(o[3] for o in obs)
+        latencia = segundos / len(obs) if obs else 0.0
+        bytes_doc = sum(o[1] for o in obs) / docs if docs else 0.0
+        ocioso = espera / (espera + segundos) if espera + segundos > 0 else 0.0
+
+        novo = self.tamanho
+        if falhas or latencia > self.latencia_alvo:
+            novo = self.tamanho / 2
+        elif ocioso < OCIOSO_MAX:
+            novo = self.tamanho * self.passo
+            if docs and segundos > 0:
+                novo = min(novo, self.latencia_alvo * docs / segundos)
+        if bytes_doc:
+            novo = min(novo, self.bytes_max / bytes_doc)
+        novo = self._limitar(novo)
+
+        if novo != self.tamanho:
+            motivo = "falha" if falhas else f"latência {latencia:.2f}s, {bytes_doc:,.0f} B/doc, envio ocioso {ocioso:.0%}"
+            print(f"[{self.rotulo}] 🎚️ Lote de envio {self.tamanho} -> {novo} ({motivo})")
+            self.tamanho = novo
+
+
+# ---- Tamanho das tarefas de análise ----
+class ControladorAnalise:
+    # Divide os textos de um lote em tarefas com duração próxima de DURACAO_TAREFA,
+    # usando o custo por caractere medido nos workers (passagens longas viram tarefas
+    # menores), e nunca em menos tarefas que processos, para nenhum worker ficar ocioso
+    def __init__(self, inicial, minimo=TAREFA_MIN, maximo=TAREFA_MAX, duracao_alvo=DURACAO_TAREFA, suavizacao=0.2):
+        self.inicial = inicial
+        self.minimo, self.maximo = minimo, maximo
+        self.duracao_alvo = duracao_alvo
+        self.suavizacao = suavizacao
+        self.segundos_por_char = None
+        self._trava = threading.Lock()
+
+    def dividir(self, textos, processos):
+        if not textos:
+            return []
+        with self._trava:
+            segundos_por_char = self.segundos_por_char
+        if segundos_por_char is None:
+            # Sem medição ainda: tamanho fixo inicial, repartido entre os processos
+            tamanho = max(1, min(self.inicial, math.ceil(len(textos) / processos)))
+            return [textos[i:i + tamanho] for i in range(0, len(textos), tamanho)]
+
+        total_chars = sum(len(t) for t in textos)
+        alvo_chars = min(self.duracao_alvo / max(segundos_por_char, 1e-9), math.ceil(total_chars / processos))
+        tarefas, atual, chars = [], [], 0
+        for texto in textos:
+            atual.append(texto)
+            chars += len(texto)
+            if len(atual) >= self.maximo or (chars >= alvo_chars and len(atual) >= self.minimo):
+                tarefas.append(atual)
+                atual, chars = [], 0
+        if atual:
+            tarefas.append(atual)
+        return tarefas
+
+    def observar(self, chars, segundos):
+        if chars <= 0:
+            return
+        with self._trava:
+            medido = segundos / chars
+            if self.segundos_por_char is None:
+                self.segundos_por_char = medido
+            else:
+                self.segundos_por_char += self.suavizacao * (medido - self.segundos_por_char)
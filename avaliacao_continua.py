@@ -0,0 +1,102 @@
+import math
+from collections import defaultdict
+
+from avaliacao_vetorizada import CORTES_PADRAO, CORTES_RECALL, K_PADRAO
+from cache_avaliacao import FALHAS, carregar_qrels_cache, nomes_documentos
+
+INTERVALO = 10          # consultas entre duas linhas de MAP parcial
+MINIMO_CONSULTAS = 0.2  # fração das consultas avaliadas antes de poder abortar
+
+
+class AvaliacaoContinua:
+    # Avalia cada consulta assim que a resposta chega (mesmas definições de AP, RR,
+    # nDCG@c e R@c do avaliacao_vetorizada.avaliar), mostra o MAP parcial e, com limiar_map,
+    # pede para abortar uma configuração claramente pior depois de uma fração das consultas
+    def __init__(self, arquivo_qrels, k=K_PADRAO, cortes=CORTES_PADRAO, limiar_map=None,
+                 minimo_consultas=MINIMO_CONSULTAS, intervalo=INTERVALO, cortes_recall=CORTES_RECALL):
+        qrels = carregar_qrels_cache(arquivo_qrels)
+        self.qrels = defaultdict(dict)
+        for consulta, doc, grau in zip(qrels.consulta.tolist(), nomes_documentos(qrels.doc), qrels.grau.tolist()):
+            self.qrels[consulta][doc] = grau
+        self.k = max(k, *cortes) if k else None  # None: a lista inteira, como no avaliar()
+        self.cortes = cortes
+        self.cortes_recall = cortes_recall
+        self.limiar_map = limiar_map
+        self.minimo_consultas = minimo_consultas
+        self.intervalo = intervalo
+        self.total_consultas = None
+        self.por_consulta = {}
+        self.falhas = 0
+        self.somas = defaultdict(float)
+        self.abortada = False
+
+    def iniciar(self, total_consultas):
+        self.total_consultas = total_consultas
+
+    def metricas_da_consulta(self, relevantes, docs):
+        graus = [relevantes.get(str(passage_id), 0) for passage_id, _ in docs[:self.k]]
+        n_relevantes = sum(1 for g in relevantes.values() if g > 0)
+        acertos, soma_precisoes, rr = 0, 0.0, 0.0
+        for posicao, grau in enumerate(graus, start=1):
+            if grau > 0:
+                acertos += 1
+                soma_precisoes += acertos / posicao
+                rr = rr or 1.0 / posicao
+        metricas = {"AP": soma_precisoes / n_relevantes if n_relevantes else 0.0, "RR": rr}
+        ideal = sorted(relevantes.values(), reverse=True)
+        for c in self.cortes:
+            dcg = sum(g / math.log2(p + 1) for p, g in enumerate(graus[:c], start=1))
+            idcg = sum(g / math.log2(p + 1) for p, g in enumerate(ideal[:c], start=1))
+            metricas[f"nDCG@{c}"] = dcg / idcg if idcg > 0 else 0.0
+        for c in self.cortes_recall:
+            metricas[f"R@{c}"] = sum(1 for g in graus[:c] if g > 0) / n_relevantes if n_relevantes else 0.0
+        return metricas
+
+    def observar(self, query_id, docs, status="ok"):
+        # Como no avaliar(), só contam consultas com qrels e com algum documento retornado;
+        # consultas que falharam (status em FALHAS) entram com todas as métricas zeradas
+        relevantes = self.qrels.get(int(query_id))
+        falhou = status in FALHAS
+        if relevantes is None or not (docs or falhou):
+            return None
+        self.falhas += falhou
+        metricas = self.metricas_da_consulta(relevantes, [] if falhou else docs)
+        self.por_consulta[query_id] = metricas
+        for nome, valor in metricas.items():
+            self.somas[nome] += valor
+        n = len(self.por_consulta)
+        if self.intervalo and n % self.intervalo == 0:
+            print(f"📈 MAP parcial após {n} consultas: {self.media('AP'):.4f} | "
+                  f"nDCG@{self.cortes[0]}: {self.media(f'nDCG@{self.cortes[0]}'):.4f}")
+        return metricas
+
+    def media(self, nome):
+        return self.somas[nome] / len(self.por_consulta) if self.por_consulta else 0.0
+
+    def deve_abortar(self):
+        if self.limiar_map is None or self.abortada:
+            return self.abortada
+        minimo = self.minimo_consultas
+        if isinstance(minimo, float):
+            minimo = math.ceil(minimo * (self.total_consultas or 0))
+        if len(self.por_consulta) >= max(minimo, 1) and self.media("AP") < self.limiar_map:
+            self.abortada = True
+            print(f"⛔ MAP parcial {self.media('AP'):.4f} abaixo de {self.limiar_map} após "
+                  f"{len(self.por_consulta)} consultas: execução abortada")
+        return self.abortada
+
+    def resumo(self):
+        nomes = {"AP": "MAP", "RR": "MRR"}
+        resumo = {nomes.get(m, m): self.media(m) for m in self.somas}
+        resumo.update({"consultas_avaliadas": len(self.por_consulta), "consultas_com_falha": self.falhas,
+                       "abortada": self.abortada})
+        return resumo
+
+    def imprimir_resumo(self):
+        resumo = self.resumo()
+        print(f"\n📊 Avaliação contínua: {resumo['consultas_avaliadas']} consultas"
+              + (f", {self.falhas} sem resposta contadas como zero" if self.falhas else "")
+              + (" (execução abortada)" if self.abortada else ""))
+        for nome, valor in resumo.items():
+            if nome not in ("consultas_avaliadas", "consultas_com_falha", "abortada"):
+                print(f"   {nome}: {valor:.4f}")
@@ -0,0 +1,126 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Qrels e execuções codificados como arrays paralelos; os doc ids são inteiros
+# vindos de um vocabulário compartilhado (dict passage_id -> int)
+Qrels = namedtuple("Qrels", "consulta doc grau")
+# falhas: consultas sem resposta (erro, timeout...), que não têm linhas mas contam com métricas zeradas
+Execucao = namedtuple("Execucao", "consulta doc posicao score falhas", defaults=((),))
+
+K_PADRAO = None              # profundidade avaliada; None = até a última posição da execução
+CORTES_PADRAO = (10, 100)    # P@, R@ e nDCG@
+CORTES_RECALL = (1000,)      # só R@: não alargam as matrizes além da profundidade da execução
+
+
+# ---- Codificação ----
+def internar(doc_ids, vocabulario):
+    return np.fromiter((vocabulario.setdefault(d, len(vocabulario)) for d in doc_ids),
+                       dtype=np.int64, count=len(doc_ids))
+
+def codificar_qrels(qrels, vocabulario):
+    # qrels: {consulta: {doc_id: relevancia}} como devolvido por carregar_qrels
+    consultas, docs, graus = [], [], []
+    for consulta_id, relevantes in qrels.items():
+        consultas.extend([int(consulta_id)] * len(relevantes))
+        docs.extend(relevantes.keys())
+        graus.extend(relevantes.values())
+    return Qrels(np.array(consultas, dtype=np.int64), internar(docs, vocabulario),
+                 np.array(graus, dtype=np.int8))
+
+def codificar_resultados(resultados, vocabulario):
+    # resultados: {consulta: [(doc_id, score), ...]} na ordem do ranking
+    consultas, docs, posicoes, scores = [], [], [], []
+    for consulta_id, ranqueados in resultados.items():
+        consultas.extend([int(consulta_id)] * len(ranqueados))
+        posicoes.extend(range(len(ranqueados)))
+        for doc_id, score in ranqueados:
+            docs.append(doc_id)
+            scores.append(score)
+    return Execucao(np.array(consultas, dtype=np.int64), internar(docs, vocabulario),
+                    np.array(posicoes, dtype=np.int32), np.array(scores, dtype=np.float32))
+
+
+# ---- Matrizes consultas × posição ----
+def _linhas(consultas, ids):
+    linha = np.searchsorted(consultas, ids)
+    linha = np.minimum(linha, len(consultas) - 1)
+    return linha, consultas[linha] == ids
+
+def profundidade(execucao):
+    return int(execucao.posicao.max()) + 1 if len(execucao.posicao) else 1
+
+def matriz_relevancia(execucao, qrels, consultas, k):
+    # Grau de relevância (0-3) de cada documento ranqueado, uma linha por consulta
+    chaves_qrels = (qrels.consulta.astype(np.int64) << 32) | qrels.doc
+    ordem = np.argsort(chaves_qrels, kind="stable")
+    chaves_qrels = chaves_qrels[ordem]
+    graus_qrels = qrels.grau[ordem]
+
+    chaves = (execucao.consulta.astype(np.int64) << 32) | execucao.doc
+    graus = np.zeros(len(chaves), dtype=np.int8)
+    if len(chaves_qrels):
+        pos = np.minimum(np.searchsorted(chaves_qrels, chaves), len(chaves_qrels) - 1)
+        achou = chaves_qrels[pos] == chaves
+        graus[achou] = graus_qrels[pos[achou]]
+
+    linha, valido = _linhas(consultas, execucao.consulta)
+    valido &= execucao.posicao < k
+    matriz = np.zeros((len(consultas), k), dtype=np.int8)
+    matriz[linha[valido], execucao.posicao[valido]] = graus[valido]
+    return matriz
+
+def matriz_ideal(qrels, consultas, k):
+    # Graus dos qrels em ordem decrescente por consulta (ranking ideal do nDCG)
+    linha, valido = _linhas(consultas, qrels.consulta)
+    linha, graus = linha[valido], qrels.grau[valido]
+    ordem = np.lexsort((-graus.astype(np.int16), linha))
+    linha, graus = linha[ordem], graus[ordem]
+    inicio_linha = np.searchsorted(linha, linha, side="left")
+    posicao = np.arange(len(linha)) - inicio_linha
+    dentro = posicao < k
+    ideal = np.zeros((len(consultas), k), dtype=np.int8)
+    ideal[linha[dentro], posicao[dentro]] = graus[dentro]
+    n_relevantes = np.bincount(linha[graus > 0], minlength=len(consultas))
+    return ideal, n_relevantes
+
+
+# ---- Métricas ----
+def avaliar(execucao, qrels, k=K_PADRAO, cortes=CORTES_PADRAO, consultas=None, cortes_recall=CORTES_RECALL):
+    if consultas is None:
+        # Mesma regra do calcular_map: só consultas presentes na execução e nos qrels
+        consultas = np.intersect1d(np.union1d(execucao.consulta, execucao.falhas), qrels.consulta)
+    if len(consultas) == 0:
+        return {"consultas": consultas}
+    k = max(k or profundidade(execucao), *cortes)
+    rel = matriz_relevancia(execucao, qrels, consultas, k)
+    ideal, n_relevantes = matriz_ideal(qrels, consultas, k)
+
+    binaria = rel > 0
+    acertos = np.cumsum(binaria, axis=1)
+    posicoes = np.arange(1, k + 1)
+    divisor = np.maximum(n_relevantes, 1)
+
+    metricas = {"consultas": consultas}
+    metricas["AP"] = np.where(n_relevantes > 0, (acertos / posicoes * binaria).sum(axis=1) / divisor, 0.0)
+    primeira = binaria.argmax(axis=1)
+    metricas["RR"] = np.where(binaria.any(axis=1), 1.0 / (primeira + 1), 0.0)
+
+    desconto = 1.0 / np.log2(posicoes + 1)
+    dcg = np.cumsum(rel * desconto, axis=1)
+    idcg = np.cumsum(ideal * desconto, axis=1)
+    for c in cortes:
+        metricas[f"P@{c}"] = acertos[:, c - 1] / c
+        metricas[f"R@{c}"] = np.where(n_relevantes > 0, acertos[:, c - 1] / divisor, 0.0)
+        metricas[f"nDCG@{c}"] = np.divide(dcg[:, c - 1], idcg[:, c - 1],
+                                          out=np.zeros(len(consultas)), where=idcg[:, c - 1] > 0)
+    for c in cortes_recall:
+        # Não há hits depois da posição k: o recall em c > k é o da última coluna
+        metricas[f"R@{c}"] = np.where(n_relevantes > 0, acertos[:, min(c, k) - 1] / divisor, 0.0)
+    return metricas
+
+def resumir(metricas):
+    # Médias sobre as consultas (AP -> MAP, RR -> MRR)
+    nomes = {"AP": "MAP", "RR": "MRR"}
+    return {nomes.get(m, m): float(v.mean()) if len(v) else 0.0
+            for m, v in metricas.items() if m != "consultas"}
@@ -0,0 +1,107 @@
+import argparse
+import time
+
+import pysolr
+
+from leitor_corpus import carregar_json_em_lotes
+from cliente_solr import ClienteSolrJSON, serializar_lote, orjson
+
+# Configurações
+JSON_FILE = 'quati_1M_passages.json'
+BATCH_SIZE = 1000
+NUM_LOTES = 20
+SOLR_URL = 'http://localhost:8983/solr/exemplo_stemming'
+
+
+def preparar_lote(lote):
+    # Mesmo formato enviado pelo indexador com stemming
+    for doc in lote:
+        doc['texto_com_stem'] = doc.get('passage', '')
+    return lote
+
+
+def carregar_lotes(json_file, batch_size, num_lotes):
+    lotes = []
+    for lote in carregar_json_em_lotes(json_file, batch_size):
+        lotes.append(preparar_lote(lote))
+        if len(lotes) == num_lotes:
+            break
+    return lotes
+
+
+# ---- Caminhos comparados ----
+def caminho_pysolr(solr_url, enviar):
+    solr = pysolr.Solr(solr_url, timeout=60)
+    update_original = solr._update
+    enviados = []
+
+    def _update(mensagem, *args, **kwargs):
+        # Sem --enviar o corpo XML é só capturado: sobra o custo de montar a mensagem
+        enviados.append(len(mensagem if isinstance(mensagem, bytes) else mensagem.encode("utf-8")))
+        if enviar:
+            return update_original(mensagem, *args, **kwargs)
+
+    solr._update = _update
+
+    def add(lote):
+        solr.add(lote, commit=False)
+        return enviados[-1]
+    return add
+
+
+def caminho_json(solr_url, enviar):
+    if not enviar:
+        return lambda lote: len(serializar_lote(lote))
+    cliente = ClienteSolrJSON(solr_url, timeout=60)
+
+    def add(lote):
+        corpo = serializar_lote(lote)
+        cliente.enviar_bytes(corpo)
+        return len(corpo)
+    return add
+
+
+def medir(nome, add, lotes):
+    cpu, bytes_enviados = [], 0
+    inicio_total = time.perf_counter()
+    for lote in lotes:
+        inicio = time.process_time()
+        bytes_enviados += add(lote)
+        cpu.append(time.process_time() - inicio)
+    tempo_total = time.perf_counter() - inicio_total
+    docs = sum(len(lote) for lote in lotes)
+    return {"nome": nome, "cpu_lote_ms": 1000 * sum(cpu) / len(cpu), "bytes_lote": bytes_enviados / len(lotes),
+            "bytes_doc": bytes_enviados / docs, "docs_por_segundo": docs / tempo_total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o envio de lotes via pysolr (XML) e via JSON.")
+    parser.add_argument("--json", default=JSON_FILE)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    parser.add_argument("--lotes", type=int, default=NUM_LOTES)
+    parser.add_argument("--solr", default=SOLR_URL)
+    parser.add_argument("--enviar", action="store_true",
+                        help="faz o POST de verdade (sem commit) em vez de só montar o corpo")
+    args = parser.parse_args()
+
+    lotes = carregar_lotes(args.json, args.batch, args.lotes)
+    if not lotes:
+        print("❌ Nenhum documento lido.")
+        return
+    print(f"🔄 {len(lotes)} lotes de até {args.batch} docs | serializador JSON: {'orjson' if orjson else 'json'}"
+          f" | {'com envio a ' + args.solr if args.enviar else 'sem envio'}")
+
+    resultados = [medir("pysolr (XML)", caminho_pysolr(args.solr, args.enviar), lotes),
+                  medir("JSON", caminho_json(args.solr, args.enviar), lotes)]
+
+    print(f"\n   {'caminho':<14}{'CPU/lote':>11}{'bytes/lote':>14}{'bytes/doc':>11}{'docs/s':>11}")
+    for r in resultados:
+        print(f"   {r['nome']:<14}{r['cpu_lote_ms']:>9.2f}ms{r['bytes_lote']:>14,.0f}{r['bytes_doc']:>11,.0f}"
+              f"{r['docs_por_segundo']:>11,.0f}")
+    xml, js = resultados
+    print(f"\n📉 CPU por lote: {1 - js['cpu_lote_ms'] / xml['cpu_lote_ms']:.1%} menor | "
+          f"bytes no fio: {1 - js['bytes_lote'] / xml['bytes_lote']:.1%} menor")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+import argparse
+import contextlib
+import csv
+import json
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from consulta_solr import publicar
+from leitor_corpus import iterar_documentos
+
+# Configurações
+JSON_FILE = 'quati_1M_passages.json'
+ROWS = 100
+K1 = 1.2    # mesmos valores padrão do BM25Similarity do Solr
+B = 0.75
+BUFFERS = os.cpu_count() or 1  # acumuladores densos (float32 por documento) vivos ao mesmo tempo
+
+_PALAVRA = re.compile(r"\w+")
+
+
+def tokenizar(texto):
+    return _PALAVRA.findall(texto.lower())
+
+
+# ---- Índice invertido em arrays ----
+class IndiceBM25:
+    # Postings em formato CSR: os documentos do termo t estão em
+    # docs[offsets[t]:offsets[t + 1]], com as frequências em tfs
+    def __init__(self, termos, offsets, docs, tfs, doc_lens, doc_ids, analisador=tokenizar, k1=K1, b=B):
+        self.termos = termos          # termo -> id
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_lens = doc_lens
+        self.doc_ids = doc_ids        # passage_id de cada documento (bytes)
+        self.analisador = analisador
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(doc_lens)
+        media = float(np.mean(doc_lens)) if self.num_docs else 1.0
+        # Parte do denominador do BM25 que só depende do documento
+        self.norma = (k1 * (1 - b + b * np.asarray(doc_lens, dtype=np.float32) / media)).astype(np.float32)
+        self._livres = []
+        self._vagas = threading.Semaphore(BUFFERS)
+        self._trava = threading.Lock()
+
+    @contextlib.contextmanager
+    def _buffer_scores(self):
+        # Acumuladores reaproveitados entre consultas, no máximo BUFFERS ao mesmo tempo:
+        # com centenas de threads (carga_consultas) as excedentes esperam um livre, como
+        # esperariam por um worker do Solr, em vez de alocar um vetor do corpus cada uma
+        with self._vagas:
+            with self._trava:
+                scores = self._livres.pop() if self._livres else None
+            if scores is None:
+                scores = np.zeros(self.num_docs, dtype=np.float32)
+            try:
+                yield scores
+            except BaseException:
+                scores.fill(0.0)
+                raise
+            finally:
+                with self._trava:
+                    self._livres.append(scores)
+
+    def termo_id(self, termo):
+        return self.termos.get(termo)
+
+    def postings(self, termo_id):
+        inicio, fim = self.offsets[termo_id], self.offsets[termo_id + 1]
+        return self.docs[inicio:fim], self.tfs[inicio:fim]
+
+    def buscar(self, texto, rows=ROWS):
+        with self._buffer_scores() as acumulado:
+            candidatos, scores = self._acumular(texto, acumulado)
+        if candidatos is None:
+            return []
+        # Top-k por seleção parcial (argpartition) e ordenação só dos k escolhidos
+        if len(candidatos) > rows:
+            melhores = np.argpartition(-scores, rows - 1)[:rows]
+        else:
+            melhores = np.arange(len(candidatos))
+        melhores = melhores[np.lexsort((candidatos[melhores], -scores[melhores]))]
+        return [(self.doc_ids[candidatos[i]].decode("utf-8"), float(scores[i])) for i in melhores]
+
+    def _acumular(self, texto, acumulado):
+        # Devolve (documentos, scores) não nulos e deixa o acumulador zerado para a próxima consulta
+        encontrou = False
+        for termo, vezes in Counter(self.analisador(texto)).items():
+            termo_id = self.termo_id(termo)
+            if termo_id is None:
+                continue
+            docs, tfs = self.postings(termo_id)
+            df = len(docs)
+            idf = np.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            tfs = tfs.astype(np.float32)
+            # Postings de um termo não repetem documento, então a soma indexada é segura
+            acumulado[docs] += vezes * idf * tfs / (tfs + self.norma[docs])
+            encontrou = True
+        if not encontrou:
+            return None, None
+
+        # Toda contribuição do BM25 é positiva: os candidatos são os scores não nulos,
+        # o que evita ordenar a união das listas de postings
+        candidatos = np.flatnonzero(acumulado)
+        scores = acumulado[candidatos]
+        if len(candidatos) > self.num_docs // 4:
+            acumulado.fill(0.0)
+        else:
+            acumulado[candidatos] = 0.0
+        return candidatos, scores
+
+
+def construir_indice(json_file=JSON_FILE, campo='passage', analisador=tokenizar, k1=K1, b=B):
+    termos = {}
+    buf_termos, buf_docs, buf_tfs = array('i'), array('i'), array('H')
+    doc_lens, doc_ids = array('I'), []
+    start = time.time()
+
+    for doc_num, doc in enumerate(iterar_documentos(json_file)):
+        tokens = analisador(doc.get(campo, ''))
+        passage_id = doc.get('passage_id', '')
+        doc_ids.append((passage_id[0] if isinstance(passage_id, list) else passage_id).encode("utf-8"))
+        doc_lens.append(len(tokens))
+        for termo, tf in Counter(tokens).items():
+            buf_termos.append(termos.setdefault(termo, len(termos)))
+            buf_docs.append(doc_num)
+            buf_tfs.append(min(tf, 65535))
+        if (doc_num + 1) % 100000 == 0:
+            print(f"[bm25] {doc_num + 1} documentos analisados...")
+
+    termos_arr = np.frombuffer(buf_termos, dtype=np.int32)
+    # Ordenação estável por termo mantém os documentos em ordem crescente dentro de cada lista
+    ordem = np.argsort(termos_arr, kind="stable")
+    offsets = np.zeros(len(termos) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(termos_arr, minlength=len(termos)), out=offsets[1:])
+    indice = IndiceBM25(
+        termos, offsets,
+        np.frombuffer(buf_docs, dtype=np.int32)[ordem],
+        np.frombuffer(buf_tfs, dtype=np.uint16)[ordem],
+        np.frombuffer(doc_lens, dtype=np.uint32).copy(),
+        np.array(doc_ids, dtype="S"),
+        analisador=analisador, k1=k1, b=b,
+    )
+    print(f"[bm25] ✅ Índice com {indice.num_docs} documentos e {len(termos)} termos "
+          f"construído em {time.time() - start:.2f} segundos")
+    return indice
+
+
+# ---- Índice em disco (aberto com mmap) ----
+# Arquivos de um índice salvo:
+#   termos.npy       termos em bytes utf-8, ordenados (busca binária, sem dict)
+#   docs.bin         doc ids de cada lista em deltas codificados em varint
+#   tfs.bin          frequências em varint
+#   offsets_docs.npy / offsets_tfs.npy   início de cada lista nos arquivos .bin
+#   df.npy, doc_lens.npy, doc_ids.npy, meta.json
+FORMATO_INDICE = 1
+
+
+def codificar_varint(valores):
+    # LEB128: 7 bits por byte, bit alto ligado enquanto o número continua
+    valores = np.asarray(valores, dtype=np.uint64)
+    num_bytes = np.ones(len(valores), dtype=np.int64)
+    for limite in (1 << 7, 1 << 14, 1 << 21, 1 << 28):
+        num_bytes += valores >= limite
+    inicio = np.zeros(len(valores), dtype=np.int64)
+    np.cumsum(num_bytes[:-1], out=inicio[1:])
+    saida = np.zeros(int(num_bytes.sum()), dtype=np.uint8)
+    for j in range(int(num_bytes.max(initial=0))):
+        tem = num_bytes > j
+        byte = (valores[tem] >> np.uint64(7 * j)) & np.uint64(0x7F)
+        continua = (num_bytes[tem] - 1 > j).astype(np.uint64) << np.uint64(7)
+        saida[inicio[tem] + j] = (byte | continua).astype(np.uint8)
+    return saida, num_bytes
+
+def decodificar_varint(dados, quantidade):
+    dados = np.asarray(dados)
+    fim = dados < 0x80
+    valor_de = np.zeros(len(dados), dtype=np.int64)
+    np.cumsum(fim[:-1], out=valor_de[1:])
+    primeiro = np.flatnonzero(np.concatenate(([True], fim[:-1])))
+    deslocamento = 7 * (np.arange(len(dados)) - primeiro[valor_de])
+    partes = (dados & 0x7F).astype(np.float64) * np.exp2(deslocamento)
+    # Valores até 2^35 cabem sem perda no float64 do bincount
+    return np.bincount(valor_de, weights=partes, minlength=quantidade).astype(np.int64)
+
+def salvar_indice(indice, diretorio):
+    os.makedirs(diretorio, exist_ok=True)
+    start = time.time()
+
+    # Renumera os termos em ordem de bytes para permitir busca binária no mmap
+    por_id = [None] * len(indice.termos)
+    for termo, termo_id in indice.termos.items():
+        por_id[termo_id] = termo.encode("utf-8")
+    termos = np.array(por_id, dtype="S")
+    nova_ordem = np.argsort(termos, kind="stable")
+    df = np.diff(indice.offsets)[nova_ordem]
+    offsets = np.zeros(len(df) + 1, dtype=np.int64)
+    np.cumsum(df, out=offsets[1:])
+    origem = np.repeat(indice.offsets[:-1][nova_ordem] - offsets[:-1], df) + np.arange(offsets[-1])
+    docs = np.asarray(indice.docs)[origem].astype(np.int64)
+    tfs = np.asarray(indice.tfs)[origem]
+
+    # Deltas dentro de cada lista; o primeiro doc de cada lista fica absoluto
+    deltas = docs.copy()
+    deltas[1:] -= docs[:-1]
+    deltas[offsets[:-1][df > 0]] = docs[offsets[:-1][df > 0]]
+
+    for nome, valores in (("docs", deltas), ("tfs", tfs)):
+        dados, num_bytes = codificar_varint(valores)
+        dados.tofile(os.path.join(diretorio, f"{nome}.bin"))
+        por_termo = np.zeros(len(df) + 1, dtype=np.int64)
+        np.cumsum(np.add.reduceat(num_bytes, offsets[:-1]) if len(df) else [], out=por_termo[1:])
+        np.save(os.path.join(diretorio, f"offsets_{nome}.npy"), por_termo)
+
+    np.save(os.path.join(diretorio, "termos.npy"), termos[nova_ordem])
+    np.save(os.path.join(diretorio, "df.npy"), df.astype(np.int32))
+    np.save(os.path.join(diretorio, "doc_lens.npy"), np.asarray(indice.doc_lens, dtype=np.uint32))
+    np.save(os.path.join(diretorio, "doc_ids.npy"), np.asarray(indice.doc_ids))
+    with open(os.path.join(diretorio, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"formato": FORMATO_INDICE, "k1": indice.k1, "b": indice.b,
+                   "num_docs": indice.num_docs, "analisador": indice.analisador.__name__}, f)
+    print(f"[bm25] 💾 Índice salvo em {diretorio} em {time.time() - start:.2f} segundos")
+
+
+class IndiceMapeado(IndiceBM25):
+    # Mesmo índice, lido direto dos arquivos: reabrir custa milissegundos e vários
+    # processos de consulta compartilham as mesmas páginas do cache do sistema
+    def __init__(self, diretorio, analisador=tokenizar):
+        with open(os.path.join(diretorio, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["formato"] != FORMATO_INDICE:
+            raise ValueError(f"Formato de índice {meta['formato']} não suportado em {diretorio}")
+
+        def abrir(nome):
+            return np.load(os.path.join(diretorio, nome), mmap_mode="r")
+
+        def abrir_bin(nome):
+            caminho = os.path.join(diretorio, nome)
+            if os.path.getsize(caminho) == 0:
+                return np.zeros(0, dtype=np.uint8)
+            return np.memmap(caminho, dtype=np.uint8, mode="r")
+
+        self.df = abrir("df.npy")
+        self.offsets_docs = abrir("offsets_docs.npy")
+        self.offsets_tfs = abrir("offsets_tfs.npy")
+        self.dados_docs = abrir_bin("docs.bin")
+        self.dados_tfs = abrir_bin("tfs.bin")
+        super().__init__(abrir("termos.npy"), None, None, None, abrir("doc_lens.npy"), abrir("doc_ids.npy"),
+                         analisador=analisador, k1=meta["k1"], b=meta["b"])
+
+    def termo_id(self, termo):
+        chave = termo.encode("utf-8")
+        if not len(self.termos) or len(chave) > self.termos.dtype.itemsize:
+            return None
+        i = int(np.searchsorted(self.termos, chave))
+        if i < len(self.termos) and self.termos[i] == chave:
+            return i
+        return None
+
+    def postings(self, termo_id):
+        df = int(self.df[termo_id])
+        deltas = decodificar_varint(self.dados_docs[self.offsets_docs[termo_id]:self.offsets_docs[termo_id + 1]], df)
+        tfs = decodificar_varint(self.dados_tfs[self.offsets_tfs[termo_id]:self.offsets_tfs[termo_id + 1]], df)
+        return np.cumsum(deltas), tfs
+
+
+def abrir_indice(diretorio, analisador=tokenizar):
+    return IndiceMapeado(diretorio, analisador)
+
+
+# ---- Mesma interface e CSV do consultar_solr ----
+def consultar_local(consultas, indice, output_csv, rows=ROWS, avaliacao=None):
+    # output_csv=None: só a avaliação contínua (avaliacao_continua.py), sem CSV
+    with open(f"{output_csv}.parcial" if output_csv else os.devnull, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["número_da_consulta", "número_do_documento", "ordem_no_ranking", "score"])
+        if avaliacao:
+            avaliacao.iniciar(len(consultas))
+
+        total_start = time.time()
+        for query_id, query_text in consultas:
+            start = time.time()
+            docs = indice.buscar(query_text, rows)
+            for rank, (passage_id, score) in enumerate(docs, start=1):
+                writer.writerow([query_id, passage_id, rank, score])
+            end = time.time()
+            print(f"✅ Consulta {query_id} (local) concluída em {(end - start) * 1000:.2f} ms")
+            if avaliacao:
+                avaliacao.observar(query_id, docs)
+                if avaliacao.deve_abortar():
+                    break
+        total_end = time.time()
+        print(f"\n⏱️ Tempo total de consulta [local]: {total_end - total_start:.2f} segundos")
+        if avaliacao:
+            avaliacao.imprimir_resumo()
+    # Como no consultar_solr: execução abortada não ocupa o nome do CSV
+    destino = publicar(output_csv, bool(avaliacao and avaliacao.abortada))
+    if destino and destino != output_csv:
+        print(f"⛔ Resultados da execução abortada em {destino} (o CSV anterior foi mantido)")
+
+
+# ---- Execução ----
+if __name__ == "__main__":
+    from consulta_solr import get_relevant_query_ids, carregar_consultas_relevantes
+    from avaliacao_continua import AvaliacaoContinua
+
+    parser = argparse.ArgumentParser(description="BM25 local, sem Solr")
+    parser.add_argument("--json", default=JSON_FILE)
+    parser.add_argument("--campo", default="passage")
+    parser.add_argument("--saida", default="resultados_local.csv")
+    parser.add_argument("--indice", help="diretório do índice salvo; é criado se ainda não existir")
+    parser.add_argument("--limiar-map", type=float, default=None,
+                        help="aborta se o MAP parcial ficar abaixo disso (avaliação contínua)")
+    args = parser.parse_args()
+
+    if args.indice and os.path.exists(os.path.join(args.indice, "meta.json")):
+        start = time.time()
+        indice = abrir_indice(args.indice)
+        print(f"[bm25] Índice reaberto em {(time.time() - start) * 1000:.1f} ms")
+    else:
+        indice = construir_indice(args.json, args.campo)
+        if args.indice:
+            salvar_indice(indice, args.indice)
+    relevant_ids = get_relevant_query_ids("quati_1M_qrels.txt")
+    consultas = carregar_consultas_relevantes("quati_all_topics.tsv", relevant_ids)
+    avaliacao = AvaliacaoContinua("quati_1M_qrels.txt", limiar_map=args.limiar_map)
+    consultar_local(consultas, indice, args.saida, avaliacao=avaliacao)
+    print(f"Consultas finalizadas. Resultados em {args.saida}")
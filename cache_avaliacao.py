@@ -0,0 +1,201 @@
+import contextlib
+import csv
+import hashlib
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import Counter
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: só a trava entre threads
+    fcntl = None
+
+from avaliacao_vetorizada import Execucao, Qrels
+
+CACHE_DIR = ".cache_avaliacao"
+
+# Registros gravados em .npy e abertos com mmap: carregar uma execução não copia nada
+TIPO_EXECUCAO = np.dtype([("consulta", "<i4"), ("doc", "<i4"), ("posicao", "<i4"), ("score", "<f4")])
+TIPO_QRELS = np.dtype([("consulta", "<i4"), ("doc", "<i4"), ("grau", "i1")])
+
+# Status do <execução>.status.csv (consulta_solr.abrir_status) de consultas que ficaram sem resposta
+FALHAS = ("erro", "timeout", "prazo_esgotado", "nao_executada")
+
+_trava = threading.Lock()
+
+
+@contextlib.contextmanager
+def _travado(cache_dir):
+    # O vocabulário é lido, estendido e regravado: avaliadores rodando ao mesmo tempo
+    # (processos diferentes) precisam de uma trava no sistema de arquivos, não só entre threads
+    with _trava:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, "vocabulario.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# ---- Vocabulário de passage ids (só cresce, compartilhado por qrels e execuções) ----
+def _caminho_vocabulario(cache_dir):
+    return os.path.join(cache_dir, "vocabulario.npy"), os.path.join(cache_dir, "vocabulario.id")
+
+def _id_vocabulario(cache_dir):
+    # Muda sempre que o vocabulário é recriado, invalidando os caches antigos
+    _, caminho_id = _caminho_vocabulario(cache_dir)
+    if not os.path.exists(caminho_id):
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(caminho_id, "w") as f:
+            f.write(uuid.uuid4().hex)
+    with open(caminho_id) as f:
+        return f.read().strip()
+
+def carregar_vocabulario(cache_dir=CACHE_DIR):
+    caminho, _ = _caminho_vocabulario(cache_dir)
+    if not os.path.exists(caminho):
+        return np.array([], dtype="S1")
+    return np.load(caminho, mmap_mode="r")
+
+def nomes_documentos(docs, cache_dir=CACHE_DIR):
+    vocabulario = carregar_vocabulario(cache_dir)
+    return [d.decode("utf-8") for d in vocabulario[np.asarray(docs)]]
+
+def _internar_e_salvar(doc_ids, cache_dir):
+    caminho, _ = _caminho_vocabulario(cache_dir)
+    existentes = carregar_vocabulario(cache_dir)
+    indice = {d.decode("utf-8"): i for i, d in enumerate(existentes)}
+    novos = []
+    resultado = np.empty(len(doc_ids), dtype=np.int32)
+    for j, doc_id in enumerate(doc_ids):
+        i = indice.get(doc_id)
+        if i is None:
+            i = indice[doc_id] = len(indice)
+            novos.append(doc_id.encode("utf-8"))
+        resultado[j] = i
+    if novos:
+        vocabulario = np.concatenate([np.asarray(existentes), np.array(novos)])
+        _salvar_atomico(caminho, vocabulario)
+    return resultado
+
+
+# ---- Arquivos de cache ----
+def _salvar_atomico(caminho, array):
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as f:
+        np.save(f, array)
+    os.replace(temporario, caminho)
+
+def _caminho_cache(caminho_origem, cache_dir):
+    # Chave: arquivo de origem (caminho, tamanho, mtime) + geração do vocabulário
+    info = os.stat(caminho_origem)
+    chave = f"{os.path.abspath(caminho_origem)}|{info.st_size}|{info.st_mtime_ns}|{_id_vocabulario(cache_dir)}"
+    resumo = hashlib.sha1(chave.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(caminho_origem)}.{resumo}.npy")
+
+def _carregar_ou_converter(caminho_origem, cache_dir, converter):
+    with _travado(cache_dir):
+        destino = _caminho_cache(caminho_origem, cache_dir)
+        if not os.path.exists(destino):
+            _salvar_atomico(destino, converter(caminho_origem, cache_dir))
+    return np.load(destino, mmap_mode="r")
+
+def limpar_doc_id(doc_id_raw):
+    # Alguns CSVs trazem o id no formato de lista: ['clueweb22-...']
+    return doc_id_raw.strip().strip("[]").replace("'", "").replace('"', "")
+
+
+# ---- Conversão dos formatos texto ----
+def _converter_qrels(arquivo_qrels, cache_dir):
+    consultas, docs, graus = [], [], []
+    with open(arquivo_qrels, 'r', encoding='utf-8') as f:
+        for linha in f:
+            parts = linha.strip().split()
+            if len(parts) == 4:
+                consultas.append(int(parts[0]))
+                docs.append(parts[2])
+                graus.append(int(parts[3]))
+    registros = np.empty(len(docs), dtype=TIPO_QRELS)
+    registros["consulta"] = consultas
+    registros["doc"] = _internar_e_salvar(docs, cache_dir)
+    registros["grau"] = graus
+    return registros
+
+def _ler_resultados(path_csv):
+    # Só a leitura do CSV, sem tocar no vocabulário: pode rodar em outro processo
+    consultas, docs, posicoes, scores = [], [], [], []
+    proxima_posicao = {}
+    with open(path_csv, newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            consulta_id = int(row['número_da_consulta'])
+            posicao = proxima_posicao.get(consulta_id, 0)
+            proxima_posicao[consulta_id] = posicao + 1
+            consultas.append(consulta_id)
+            docs.append(limpar_doc_id(row['número_do_documento']))
+            posicoes.append(posicao)
+            scores.append(float(row['score']))
+    return consultas, docs, posicoes, scores
+
+def _registros_execucao(lidos, cache_dir):
+    consultas, docs, posicoes, scores = lidos
+    registros = np.empty(len(docs), dtype=TIPO_EXECUCAO)
+    registros["consulta"] = consultas
+    registros["doc"] = _internar_e_salvar(docs, cache_dir)
+    registros["posicao"] = posicoes
+    registros["score"] = scores
+    return registros
+
+def _converter_resultados(path_csv, cache_dir):
+    return _registros_execucao(_ler_resultados(path_csv), cache_dir)
+
+
+def consultas_com_falha(path_csv):
+    # Consultas sem linhas no CSV porque falharam: sem isso elas somem da média em vez de contar como zero
+    caminho = f"{os.path.splitext(path_csv)[0]}.status.csv"
+    if not os.path.exists(caminho):
+        return np.array([], dtype=np.int64)
+    falhas = {}
+    with open(caminho, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['status'] in FALHAS:
+                falhas[int(row['número_da_consulta'])] = row['status']
+    if falhas:
+        contagem = ", ".join(f"{s}={n}" for s, n in sorted(Counter(falhas.values()).items()))
+        print(f"⚠️ {path_csv}: {len(falhas)} consultas sem resposta ({contagem}); contam com AP = 0")
+    return np.array(sorted(falhas), dtype=np.int64)
+
+
+# ---- API ----
+def carregar_qrels_cache(arquivo_qrels, cache_dir=CACHE_DIR):
+    registros = _carregar_ou_converter(arquivo_qrels, cache_dir, _converter_qrels)
+    return Qrels(registros["consulta"], registros["doc"], registros["grau"])
+
+def carregar_execucao_cache(path_csv, cache_dir=CACHE_DIR):
+    registros = _carregar_ou_converter(path_csv, cache_dir, _converter_resultados)
+    return Execucao(registros["consulta"], registros["doc"], registros["posicao"], registros["score"],
+                    consultas_com_falha(path_csv))
+
+def carregar_execucoes_cache(caminhos, cache_dir=CACHE_DIR, processos=None):
+    # Várias execuções de uma vez: os CSVs ainda sem cache são lidos em paralelo e
+    # internados no vocabulário um de cada vez, neste processo (único escritor)
+    with _travado(cache_dir):
+        pendentes = [c for c in dict.fromkeys(caminhos) if not os.path.exists(_caminho_cache(c, cache_dir))]
+    processos = min(processos or multiprocessing.cpu_count(), len(pendentes))
+    if processos > 1:
+        with multiprocessing.Pool(processes=processos) as pool:
+            lidos = pool.map(_ler_resultados, pendentes)
+        with _travado(cache_dir):
+            for caminho, lido in zip(pendentes, lidos):
+                destino = _caminho_cache(caminho, cache_dir)
+                if not os.path.exists(destino):
+                    _salvar_atomico(destino, _registros_execucao(lido, cache_dir))
+    return [carregar_execucao_cache(c, cache_dir) for c in caminhos]
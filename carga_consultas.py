@@ -0,0 +1,252 @@
+import argparse
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from consulta_solr import PARAMS_FORMATO, ROWS, criar_sessao, decodificar_json, montar_params, url_do_core
+from metricas_desempenho import percentis, registrar_metricas
+
+# Configurações
+TOPICS_FILE = "quati_all_topics.tsv"
+SOLR_URL = "http://localhost:8983/solr/exemplo_stemming/select"
+DURACAO = 30        # segundos por nível de carga
+TIMEOUT = 10        # segundos por requisição
+MAX_EM_VOO = 256    # threads do gerador em malha aberta (requisições simultâneas)
+PAUSA = 2           # segundos entre níveis, para o core esvaziar as filas
+BORDAS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+VAZAO_MINIMA = 0.95  # fração da taxa oferecida que o core precisa sustentar
+ERROS_MAXIMOS = 0.01  # fração de erros + timeouts aceita num nível sustentado
+
+
+def carregar_topicos(topics_file=TOPICS_FILE):
+    # Pula o cabeçalho "query_id\tquery": só linhas com id numérico são tópicos
+    with open(topics_file, "r", encoding="utf-8") as f:
+        partes = (linha.rstrip("\n").split("\t", 1) for linha in f if "\t" in linha)
+        return [texto for query_id, texto in partes if query_id.strip().isdigit()]
+
+
+# ---- Alvos: uma função texto -> hits ----
+def alvo_solr(solr_url, campo="passage", rows=ROWS, timeout=TIMEOUT, conexoes=MAX_EM_VOO):
+    sessao = criar_sessao(conexoes)
+
+    def consultar(texto):
+        resposta = sessao.get(solr_url, params={**montar_params(texto, campo, rows), **PARAMS_FORMATO["json"]},
+                              timeout=timeout)
+        resposta.raise_for_status()
+        return decodificar_json(resposta.content)[0]
+    return consultar
+
+
+def alvo_local(diretorio, rows=ROWS):
+    # Substituto local do Solr (bm25_local.py): mesmo tipo de consulta, sem rede
+    from bm25_local import abrir_indice
+    indice = abrir_indice(diretorio)
+    return lambda texto: indice.buscar(texto, rows)
+
+
+# ---- Registro das requisições de um nível ----
+class Registro:
+    def __init__(self):
+        self.latencias = []
+        self.erros = self.timeouts = 0
+        self.exemplos_erro = {}
+        self.atraso_max = 0.0
+        self.duracao = 0.0
+        self._trava = threading.Lock()
+
+    def medir(self, consultar, texto, agendado):
+        # Latência contada a partir do instante agendado: a espera por uma thread livre
+        # também entra, e um core lento não "freia" o gerador (omissão coordenada)
+        try:
+            consultar(texto)
+        except requests.Timeout:
+            with self._trava:
+                self.timeouts += 1
+            return
+        except Exception as e:
+            with self._trava:
+                self.erros += 1
+                self.exemplos_erro.setdefault(type(e).__name__, str(e)[:200])
+            return
+        latencia = time.perf_counter() - agendado
+        with self._trava:
+            self.latencias.append(latencia * 1000)
+
+    def resultado(self, modo, nivel):
+        enviadas = len(self.latencias) + self.erros + self.timeouts
+        latencias = np.asarray(self.latencias)
+        contagens = np.histogram(latencias, bins=[0] + BORDAS_MS + [np.inf])[0] if len(latencias) else []
+        rotulos = [f"<{b}ms" for b in BORDAS_MS] + [f">={BORDAS_MS[-1]}ms"]
+        resultado = {
+            "modo": modo,
+            "nivel": nivel,
+            "duracao": self.duracao,
+            "enviadas": enviadas,
+            "ok": len(self.latencias),
+            "erros": self.erros,
+            "timeouts": self.timeouts,
+            "taxa_erro": self.erros / enviadas if enviadas else 0.0,
+            "taxa_timeout": self.timeouts / enviadas if enviadas else 0.0,
+            "vazao_qps": len(self.latencias) / self.duracao if self.duracao else 0.0,
+            "latencia_ms": percentis(self.latencias),
+            "histograma_ms": dict(zip(rotulos, map(int, contagens))),
+            "atraso_agendador_ms": self.atraso_max * 1000,
+            "exemplos_erro": self.exemplos_erro,
+        }
+        if len(latencias):
+            resultado["latencia_ms"]["p999"] = float(np.quantile(latencias, 0.999))
+        if modo == "qps":
+            resultado["oferecido_qps"] = nivel
+        return resultado
+
+
+# ---- Geradores de carga ----
+def carga_aberta(consultar, textos, qps, duracao=DURACAO, max_em_voo=MAX_EM_VOO, poisson=False, semente=0):
+    # Malha aberta: as chegadas seguem o relógio (taxa fixa ou Poisson), não as respostas
+    n = max(1, int(qps * duracao))
+    rng = np.random.default_rng(semente)
+    intervalos = rng.exponential(1 / qps, n) if poisson else np.full(n, 1 / qps)
+    agenda = np.cumsum(intervalos) - intervalos[0]
+    registro = Registro()
+    with ThreadPoolExecutor(max_workers=max_em_voo) as executor:
+        inicio = time.perf_counter()
+        for i, deslocamento in enumerate(agenda.tolist()):
+            agendado = inicio + deslocamento
+            espera = agendado - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            else:
+                # Gerador atrasado: o cliente, não o core, pode ser o gargalo
+                registro.atraso_max = max(registro.atraso_max, -espera)
+            executor.submit(registro.medir, consultar, textos[i % len(textos)], agendado)
+    registro.duracao = time.perf_counter() - inicio
+    return registro.resultado("qps", qps)
+
+
+def carga_fechada(consultar, textos, clientes, duracao=DURACAO):
+    # Malha fechada: cada cliente só envia a próxima consulta depois da resposta anterior
+    registro = Registro()
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+
+    def cliente(c):
+        i = c
+        while time.perf_counter() < fim:
+            registro.medir(consultar, textos[i % len(textos)], time.perf_counter())
+            i += clientes
+
+    threads = [threading.Thread(target=cliente, args=(c,), daemon=True) for c in range(clientes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    registro.duracao = time.perf_counter() - inicio
+    return registro.resultado("clientes", clientes)
+
+
+# ---- Relatório ----
+def imprimir_nivel(r):
+    lat = r["latencia_ms"]
+    oferecido = f" (oferecido {r['oferecido_qps']:g})" if "oferecido_qps" in r else ""
+    print(f"\n📶 {r['modo']}={r['nivel']}: {r['vazao_qps']:.1f} qps{oferecido} | {r['ok']}/{r['enviadas']} ok | "
+          f"erros {r['taxa_erro']:.1%} | timeouts {r['taxa_timeout']:.1%}")
+    if lat:
+        print(f"   latência ms: p50 {lat['p50']:.1f} | p95 {lat['p95']:.1f} | p99 {lat['p99']:.1f} | "
+              f"p99.9 {lat['p999']:.1f} | max {lat['max']:.1f}")
+    maior = max(r["histograma_ms"].values(), default=0)
+    for rotulo, contagem in r["histograma_ms"].items():
+        if contagem:
+            print(f"   {rotulo:>9} {'█' * max(1, round(40 * contagem / maior))} {contagem}")
+    if r["atraso_agendador_ms"] > 100:
+        print(f"   ⚠️ Gerador atrasou até {r['atraso_agendador_ms']:.0f} ms: resultado limitado pelo cliente")
+    for tipo, mensagem in r["exemplos_erro"].items():
+        print(f"   ❌ {tipo}: {mensagem}")
+
+
+def saturacao(resultados):
+    # Malha aberta: maior taxa sustentada; malha fechada: maior vazão observada
+    sustentados = [r for r in resultados if r["modo"] == "qps"
+                   and r["vazao_qps"] >= VAZAO_MINIMA * r["oferecido_qps"]
+                   and r["taxa_erro"] + r["taxa_timeout"] <= ERROS_MAXIMOS]
+    if sustentados:
+        return max(sustentados, key=lambda r: r["oferecido_qps"])
+    fechados = [r for r in resultados if r["modo"] == "clientes"]
+    return max(fechados, key=lambda r: r["vazao_qps"]) if fechados else None
+
+
+def salvar_csv(resultados, saida):
+    with open(saida, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["modo", "nivel", "vazao_qps", "enviadas", "ok", "taxa_erro", "taxa_timeout",
+                         "p50_ms", "p95_ms", "p99_ms", "p999_ms", "max_ms"])
+        for r in resultados:
+            lat = r["latencia_ms"]
+            writer.writerow([r["modo"], r["nivel"], r["vazao_qps"], r["enviadas"], r["ok"], r["taxa_erro"],
+                             r["taxa_timeout"]] + [lat.get(p) for p in ("p50", "p95", "p99", "p999", "max")])
+
+
+def executar_niveis(consultar, textos, rotulo, qps=(), clientes=(), duracao=DURACAO, max_em_voo=MAX_EM_VOO,
+                    poisson=False, pausa=PAUSA):
+    resultados = []
+    niveis = [("qps", n) for n in qps] + [("clientes", n) for n in clientes]
+    for i, (modo, nivel) in enumerate(niveis):
+        if i and pausa:
+            time.sleep(pausa)
+        print(f"🔄 [{rotulo}] {modo}={nivel} por {duracao:g} s...")
+        if modo == "qps":
+            r = carga_aberta(consultar, textos, nivel, duracao, max_em_voo, poisson)
+        else:
+            r = carga_fechada(consultar, textos, nivel, duracao)
+        imprimir_nivel(r)
+        registrar_metricas(f"carga/{rotulo}/{modo}={nivel}", r)
+        resultados.append(r)
+
+    melhor = saturacao(resultados)
+    if melhor and melhor["modo"] == "qps":
+        print(f"\n🚀 [{rotulo}] Maior taxa sustentada: {melhor['oferecido_qps']:g} qps "
+              f"(p99 {melhor['latencia_ms'].get('p99', 0):.1f} ms)")
+    elif melhor:
+        print(f"\n🚀 [{rotulo}] Maior vazão: {melhor['vazao_qps']:.1f} qps com {melhor['nivel']} clientes")
+    else:
+        print(f"\n🚧 [{rotulo}] Nenhum nível sustentado: o core saturou já no primeiro")
+    return resultados
+
+
+# ---- Execução ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga de consultas Quati contra um core (ou o BM25 local)")
+    destino = parser.add_mutually_exclusive_group()
+    destino.add_argument("--solr", default=SOLR_URL, help="URL do /select do core")
+    destino.add_argument("--local", help="diretório de um índice salvo pelo bm25_local.py")
+    niveis = parser.add_mutually_exclusive_group(required=True)
+    niveis.add_argument("--qps", type=float, nargs="+", help="taxas de chegada (malha aberta)")
+    niveis.add_argument("--clientes", type=int, nargs="+", help="clientes simultâneos (malha fechada)")
+    parser.add_argument("--campo", default="passage")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--topicos", default=TOPICS_FILE, help="os tópicos são reenviados em ciclo")
+    parser.add_argument("--duracao", type=float, default=DURACAO)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--max-em-voo", type=int, default=MAX_EM_VOO)
+    parser.add_argument("--poisson", action="store_true", help="chegadas de Poisson em vez de intervalos fixos")
+    parser.add_argument("--pausa", type=float, default=PAUSA)
+    parser.add_argument("--saida", default=None, help="CSV com uma linha por nível")
+    args = parser.parse_args()
+
+    textos = carregar_topicos(args.topicos)
+    if args.local:
+        consultar = alvo_local(args.local, args.rows)
+        rotulo = f"local:{os.path.basename(os.path.normpath(args.local))}"
+    else:
+        consultar = alvo_solr(args.solr, args.campo, args.rows, args.timeout, args.max_em_voo)
+        rotulo = f"{url_do_core(args.solr)}#{args.campo}"
+
+    resultados = executar_niveis(consultar, textos, rotulo, args.qps or (), args.clientes or (), args.duracao,
+                                 args.max_em_voo, args.poisson, args.pausa)
+    if args.saida:
+        salvar_csv(resultados, args.saida)
+        print(f"💾 Níveis salvos em {args.saida}")
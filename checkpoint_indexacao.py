@@ -0,0 +1,109 @@
+import json
+import os
+import random
+import threading
+import time
+
+TENTATIVAS = 4        # Envios de um lote antes de ir para o dead-letter
+ESPERA_BASE = 1.0     # Segundos antes da 1ª repetição (dobra a cada tentativa)
+ESPERA_MAX = 30.0
+
+
+# ---- Repetição com backoff exponencial e jitter ----
+def repetivel(erro):
+    # Erros 4xx do Solr (documento inválido, campo inexistente) falham sempre do mesmo jeito
+    status = getattr(erro, "status", None)
+    return status is None or status >= 500
+
+
+def com_retentativas(funcao, *args, tentativas=TENTATIVAS, espera_base=ESPERA_BASE, espera_max=ESPERA_MAX,
+                     ao_repetir=None, repetir=repetivel, prazo=None):
+    # prazo: instante absoluto (time.time()) que a espera entre tentativas não pode ultrapassar
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return funcao(*args)
+        except Exception as e:
+            restante = prazo - time.time() if prazo is not None else None
+            if tentativa == tentativas or not repetir(e) or (restante is not None and restante <= 0):
+                raise
+            # "full jitter": espalha as repetições das várias threads de envio
+            espera = random.uniform(0, min(espera_max, espera_base * 2 ** (tentativa - 1)))
+            if restante is not None:
+                espera = min(espera, restante)
+            if ao_repetir:
+                ao_repetir(tentativa, e, espera)
+            time.sleep(espera)
+
+
+# ---- Checkpoint do offset confirmado no corpus ----
+class Checkpoint:
+    # Guarda até qual documento do corpus todos os lotes já foram aceitos pelo Solr.
+    # Os lotes terminam fora de ordem (várias threads de envio), então só avançamos
+    # o offset quando o intervalo logo à frente dele foi confirmado.
+    def __init__(self, rotulo, origem, diretorio="."):
+        self.rotulo = rotulo
+        self.caminho = os.path.join(diretorio, f"checkpoint_{rotulo}.json")
+        self.caminho_dead_letter = os.path.join(diretorio, f"dead_letter_{rotulo}.jsonl")
+        self.origem = {"arquivo": os.path.abspath(origem), "tamanho": os.path.getsize(origem)}
+        self.offset = 0
+        self.falhas = 0
+        self._confirmados = {}  # inicio -> fim dos lotes confirmados à frente do offset
+        self._trava = threading.Lock()
+
+        salvo = self._ler()
+        if salvo and salvo.get("origem") == self.origem:
+            self.offset = salvo["offset"]
+            print(f"[{rotulo}] ♻️ Retomando do checkpoint: {self.offset} documentos já confirmados.")
+        elif salvo:
+            print(f"[{rotulo}] ⚠️ Checkpoint de outro corpus ignorado ({self.caminho}); recomeçando do zero.")
+
+    def _ler(self):
+        if not os.path.exists(self.caminho):
+            return None
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _salvar(self):
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"origem": self.origem, "offset": self.offset,
+                       "salvo_em": time.strftime("%Y-%m-%d %H:%M:%S")}, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+    def confirmar(self, inicio, fim):
+        with self._trava:
+            self._confirmados[inicio] = fim
+            avancou = False
+            while self.offset in self._confirmados:
+                self.offset = self._confirmados.pop(self.offset)
+                avancou = True
+            if avancou:
+                self._salvar()
+
+    def falhou(self, inicio, fim, lote, erro):
+        # O lote vai para o dead-letter (já analisado, pronto para reenviar) e
+        # conta como confirmado para não travar o checkpoint
+        registro = {"inicio": inicio, "fim": fim, "erro": str(erro), "docs": lote}
+        with self._trava:
+            self.falhas += 1
+            with open(self.caminho_dead_letter, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self.confirmar(inicio, fim)
+
+    def reiniciar(self, motivo):
+        # O que já foi confirmado deixou de valer no Solr (ex.: variante apagada para
+        # reindexação completa): a leitura volta ao início do corpus
+        if self.offset:
+            print(f"[{self.rotulo}] ⚠️ Checkpoint descartado ({motivo}); recomeçando do zero.")
+        with self._trava:
+            self.offset = 0
+            self._confirmados.clear()
+            if os.path.exists(self.caminho):
+                os.remove(self.caminho)
+
+    def concluir(self):
+        # Indexação completa e commitada: a próxima execução começa do zero
+        if os.path.exists(self.caminho):
+            os.remove(self.caminho)
+        if self.falhas:
+            print(f"[{self.rotulo}] ⚠️ {self.falhas} lote(s) com falha salvos em {self.caminho_dead_letter}")
@@ -0,0 +1,86 @@
+import json
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da biblioteca padrão
+    orjson = None
+
+CONEXOES = 8  # Conexões keep-alive mantidas com o Solr
+
+
+def serializar_lote(docs):
+    # O lote inteiro vira um único array JSON em bytes, sem estruturas intermediárias por doc
+    if orjson is not None:
+        return orjson.dumps(docs)
+    return json.dumps(docs, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ErroSolr(Exception):
+    def __init__(self, mensagem, status=None):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class ClienteSolrJSON:
+    # Substituto do pysolr.Solr para indexação: mesmos add/commit, mas enviando
+    # JSON pré-serializado ao /update por uma sessão com conexões reaproveitadas
+    def __init__(self, url, timeout=60, conexoes=CONEXOES):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.cronometro = None  # preenchido por instrumentacao.instrumentar_cliente
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=conexoes)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+
+    def _post(self, caminho, corpo, params=None, tipo="application/json"):
+        r = self.sessao.post(f"{self.url}{caminho}", data=corpo, params=params,
+                             headers={"Content-Type": tipo}, timeout=self.timeout)
+        if r.status_code != 200:
+            try:
+                mensagem = r.json()["error"]["msg"]
+            except Exception:
+                mensagem = r.text[:500]
+            raise ErroSolr(f"Solr respondeu {r.status_code}: {mensagem}", r.status_code)
+        return r
+
+    def enviar_bytes(self, corpo, commit=False):
+        return self._post("/update", corpo, params={"commit": str(bool(commit)).lower()})
+
+    def add(self, docs, commit=False):
+        inicio = time.perf_counter()
+        corpo = serializar_lote(docs)
+        meio = time.perf_counter()
+        try:
+            return self.enviar_bytes(corpo, commit)
+        finally:
+            if self.cronometro:
+                self.cronometro.registrar("serialização", meio - inicio, len(docs))
+                self.cronometro.registrar("http", time.perf_counter() - meio, len(docs))
+
+    def delete(self, ids=None, q=None, commit=False):
+        comandos = {}
+        if ids:
+            comandos["delete"] = list(ids)
+        elif q:
+            comandos["delete"] = {"query": q}
+        else:
+            return None
+        return self.enviar_bytes(serializar_lote(comandos), commit)
+
+    def tipo_do_campo(self, campo):
+        # Definição completa (analisadores incluídos) do tipo de um campo no schema do core
+        r = self.sessao.get(f"{self.url}/schema/fields/{campo}", params={"wt": "json"}, timeout=self.timeout)
+        tipo = r.json().get("field", {}).get("type") if r.status_code == 200 else None
+        if tipo is None:
+            return None
+        r = self.sessao.get(f"{self.url}/schema/fieldtypes/{tipo}", params={"wt": "json", "showDefaults": "true"},
+                            timeout=self.timeout)
+        return r.json().get("fieldType") if r.status_code == 200 else None
+
+    def commit(self):
+        return self._post("/update", b'{"commit":{}}')
@@ -0,0 +1,142 @@
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+from itertools import combinations
+
+import numpy as np
+
+from avaliacao_vetorizada import avaliar
+from cache_avaliacao import carregar_execucoes_cache, carregar_qrels_cache
+from significancia import CONFIANCA, REAMOSTRAS, holm, testes_pareados
+
+# Configurações
+ARQUIVO_QRELS = "quati_1M_qrels.txt"
+EXECUCOES = ["resultados.csv", "resultados_com_stem.csv", "resultados_com_stop.csv",
+             "resultados_com_lema.csv", "resultados_sem_lema.csv"]
+MEDIDAS = ("AP", "nDCG@10")
+ALFA = 0.05
+NOMES = {"AP": "MAP", "RR": "MRR"}
+
+
+# ---- Avaliação: qrels lidos uma vez, execuções avaliadas em paralelo ----
+def avaliar_execucoes(caminhos, arquivo_qrels=ARQUIVO_QRELS, processos=None):
+    qrels = carregar_qrels_cache(arquivo_qrels)
+    execucoes = carregar_execucoes_cache(caminhos, processos=processos)
+    # avaliar() passa quase todo o tempo no NumPy, que libera o GIL
+    with ThreadPoolExecutor(max_workers=len(execucoes)) as executor:
+        return list(executor.map(lambda execucao: avaliar(execucao, qrels), execucoes))
+
+
+# ---- Significância de todos os pares ----
+def matriz_significancia(metricas, medidas=MEDIDAS, **opcoes):
+    # Todos os pares (i < j) e medidas num único teste em lote, sobre as consultas
+    # presentes em todas as execuções; Holm corrige as comparações de cada medida
+    consultas = reduce(np.intersect1d, (m["consultas"] for m in metricas))
+    if len(consultas) == 0:
+        raise ValueError("Nenhuma consulta em comum entre as execuções")
+    valores = np.stack([[m[medida][np.searchsorted(m["consultas"], consultas)] for medida in medidas]
+                        for m in metricas])  # execuções x medidas x consultas
+    pares = list(combinations(range(len(metricas)), 2))
+    a = valores[[i for i, _ in pares]].reshape(-1, len(consultas)).T
+    b = valores[[j for _, j in pares]].reshape(-1, len(consultas)).T
+    resultado = testes_pareados(a, b, **opcoes)
+
+    def por_par(valor):
+        return np.asarray(valor).reshape(len(pares), len(medidas))
+
+    p = por_par(resultado["p_aleatorizacao"])
+    return {
+        "consultas": consultas,
+        "medias": valores.mean(axis=2),
+        "pares": pares,
+        "delta": por_par(resultado["delta"]),
+        "ic": (por_par(resultado["ic"][0]), por_par(resultado["ic"][1])),
+        "p_t": por_par(resultado["p_t"]),
+        "p": p,
+        "p_holm": np.column_stack([holm(p[:, k]) for k in range(len(medidas))]),
+        "confianca": resultado["confianca"],
+        "reamostras": resultado["reamostras"],
+    }
+
+
+# ---- Relatório ----
+def nome_execucao(caminho):
+    return os.path.splitext(os.path.basename(caminho))[0]
+
+
+def imprimir_relatorio(caminhos, comparacao, medidas=MEDIDAS, alfa=ALFA):
+    nomes = [nome_execucao(c) for c in caminhos]
+    largura = max(len(n) for n in nomes) + 6
+    print(f"\n📊 COMPARAÇÃO DE {len(nomes)} EXECUÇÕES ({len(comparacao['consultas'])} consultas em comum)")
+    print("-" * (largura + 12 * len(medidas)))
+    print("".ljust(largura) + "".join(NOMES.get(m, m).rjust(12) for m in medidas))
+    for nome, medias in zip(nomes, comparacao["medias"]):
+        print(nome.ljust(largura) + "".join(f"{v:12.4f}" for v in medias))
+
+    # Matriz linha - coluna; * = significativo após Holm
+    for k, medida in enumerate(medidas):
+        print(f"\n🧮 Δ {NOMES.get(medida, medida)} (linha - coluna), * = p de Holm < {alfa}")
+        celulas = {}
+        for (i, j), delta, p in zip(comparacao["pares"], comparacao["delta"][:, k], comparacao["p_holm"][:, k]):
+            marca = "*" if p < alfa else " "
+            celulas[i, j] = f"{delta:+.4f}{marca}"
+            celulas[j, i] = f"{-delta:+.4f}{marca}"
+        print("".ljust(largura) + "".join(f"[{c}]".rjust(10) for c in range(len(nomes))))
+        for i, nome in enumerate(nomes):
+            print(f"[{i}] {nome}".ljust(largura) + "".join(celulas.get((i, j), "—").rjust(10) for j in range(len(nomes))))
+
+    print(f"\n🎲 Aleatorização pareada ({comparacao['reamostras']} reamostras) e "
+          f"IC {comparacao['confianca']:.0%} por bootstrap")
+    for n, ((i, j), linha) in enumerate(zip(comparacao["pares"], comparacao["delta"])):
+        for k, medida in enumerate(medidas):
+            print(f"   {nomes[i]} vs {nomes[j]} | {NOMES.get(medida, medida)}: Δ = {linha[k]:+.4f} "
+                  f"[{comparacao['ic'][0][n, k]:+.4f}, {comparacao['ic'][1][n, k]:+.4f}] | "
+                  f"p = {comparacao['p'][n, k]:.4f} | p Holm = {comparacao['p_holm'][n, k]:.4f} | "
+                  f"p teste t = {comparacao['p_t'][n, k]:.4f}")
+
+
+def salvar_csv(caminhos, comparacao, saida, medidas=MEDIDAS):
+    with open(saida, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["execucao_a", "execucao_b", "medida", "media_a", "media_b", "delta",
+                         "ic_inferior", "ic_superior", "p_aleatorizacao", "p_holm", "p_teste_t"])
+        for n, (i, j) in enumerate(comparacao["pares"]):
+            for k, medida in enumerate(medidas):
+                writer.writerow([nome_execucao(caminhos[i]), nome_execucao(caminhos[j]), NOMES.get(medida, medida),
+                                 comparacao["medias"][i, k], comparacao["medias"][j, k], comparacao["delta"][n, k],
+                                 comparacao["ic"][0][n, k], comparacao["ic"][1][n, k], comparacao["p"][n, k],
+                                 comparacao["p_holm"][n, k], comparacao["p_t"][n, k]])
+
+
+# ---- Execução ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara N execuções com testes pareados e correção de Holm")
+    parser.add_argument("execucoes", nargs="*", default=EXECUCOES, help="CSVs gerados pelo consultar_solr")
+    parser.add_argument("--qrels", default=ARQUIVO_QRELS)
+    parser.add_argument("--medidas", nargs="+", default=list(MEDIDAS))
+    parser.add_argument("--reamostras", type=int, default=REAMOSTRAS)
+    parser.add_argument("--confianca", type=float, default=CONFIANCA)
+    parser.add_argument("--alfa", type=float, default=ALFA)
+    parser.add_argument("--processos", type=int, default=None)
+    parser.add_argument("--saida", default=None, help="CSV com uma linha por par e medida")
+    args = parser.parse_args()
+
+    caminhos = [c for c in args.execucoes if os.path.exists(c)]
+    for ausente in set(args.execucoes) - set(caminhos):
+        print(f"⚠️ Execução não encontrada, ignorada: {ausente}")
+    if len(caminhos) < 2:
+        parser.error("são necessárias ao menos duas execuções")
+
+    inicio = time.perf_counter()
+    metricas = avaliar_execucoes(caminhos, args.qrels, args.processos)
+    avaliacao = time.perf_counter() - inicio
+    comparacao = matriz_significancia(metricas, args.medidas, reamostras=args.reamostras,
+                                      confianca=args.confianca, processos=args.processos)
+    imprimir_relatorio(caminhos, comparacao, args.medidas, args.alfa)
+    if args.saida:
+        salvar_csv(caminhos, comparacao, args.saida, args.medidas)
+        print(f"\n💾 Comparações salvas em {args.saida}")
+    print(f"\n⏱️ Avaliação: {avaliacao:.2f} s | testes: {time.perf_counter() - inicio - avaliacao:.2f} s")
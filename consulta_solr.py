@@ -0,0 +1,529 @@
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturoAtrasado
+from itertools import repeat
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from checkpoint_indexacao import com_retentativas, repetivel
+from cliente_solr import ErroSolr
+from metricas_desempenho import carregar_metricas, percentis, registrar_metricas
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson é opcional
+    _loads = json.loads
+
+ROWS = 100
+POR_PAGINA = 1000   # rows acima disso são buscados em páginas com cursorMark
+UNIQUE_KEY = "id"   # uniqueKey do core, exigido na ordenação do cursorMark
+FORMATO = "json"    # "json" (decodificado com orjson, traz o QTime) ou "csv" (resposta mais enxuta, sem QTime)
+MAX_EM_VOO = 8  # Consultas enviadas ao Solr ao mesmo tempo
+CACHE_CONSULTAS = "consultas_cache.sqlite"
+TIMEOUT = 30          # segundos por requisição HTTP
+TENTATIVAS = 3        # requisições por consulta antes de marcá-la com erro
+ESPERA_BASE = 0.5     # segundos antes da 1ª repetição (dobra a cada tentativa, com jitter)
+ESPERA_MAX = 5.0
+AMOSTRAS_HEDGE = 20   # latências observadas antes de começar a duplicar requisições lentas
+JANELA_HEDGE = 500    # latências recentes usadas no percentil do hedge
+
+
+def get_relevant_query_ids(qrels_file):
+    relevant_ids = set()
+    with open(qrels_file, "r") as f:
+        for line in f:
+            query_id, _, _, score = line.strip().split()
+            if int(score) > 0:
+                relevant_ids.add(query_id)
+    return relevant_ids
+
+def carregar_consultas_relevantes(topics_file, relevant_ids):
+    consultas = []
+    with open(topics_file, "r", encoding="utf-8") as f:
+        for line in f:
+            query_id, query_text = line.strip().split("\t", 1)
+            if query_id in relevant_ids:
+                consultas.append((query_id, query_text))
+    return consultas
+
+
+# ---- Execução das consultas ----
+def criar_sessao(max_em_voo=MAX_EM_VOO):
+    # Conexões keep-alive reaproveitadas entre consultas, uma por consulta em voo
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max_em_voo)
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+    return sessao
+
+def montar_params(query_text, campo, rows=ROWS):
+    return {
+        "q": query_text,
+        "rows": rows,
+        "fl": "passage_id,score",
+        "df": campo
+    }
+
+
+# ---- Decodificação das respostas ----
+class Resultados:
+    # Hits de uma consulta em dois arrays (ids e scores) em vez de uma tupla por
+    # documento; iterar ou fatiar devolve pares (passage_id, score) como antes
+    __slots__ = ("ids", "scores")
+
+    def __init__(self, ids=None, scores=None):
+        self.ids = ids if ids is not None else []
+        self.scores = scores if scores is not None else array("d")
+
+    @classmethod
+    def de_pares(cls, pares):
+        resultados = cls()
+        for passage_id, score in pares:
+            resultados.ids.append(passage_id)
+            resultados.scores.append(score)
+        return resultados
+
+    def estender(self, outros):
+        self.ids.extend(outros.ids)
+        self.scores.extend(outros.scores)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return zip(self.ids, self.scores)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(zip(self.ids[i], self.scores[i]))
+        return self.ids[i], self.scores[i]
+
+def _docs_json(docs):
+    resultados = Resultados()
+    ids, scores = resultados.ids, resultados.scores
+    for doc in docs:
+        # Sem schema, o Solr guarda passage_id como lista
+        valor = doc["passage_id"]
+        ids.append(valor[0] if type(valor) is list else valor)
+        scores.append(doc["score"])
+    return resultados
+
+def decodificar_json(conteudo):
+    r = _loads(conteudo)
+    if "response" not in r:
+        # Repetir a mesma consulta traz a mesma resposta: status 4xx para não entrar nas retentativas
+        erro = r.get("error", {})
+        raise ErroSolr(f"Resposta sem 'response': {erro.get('msg', str(r)[:200])}", erro.get("code") or 400)
+    return _docs_json(r["response"]["docs"]), r.get("responseHeader", {}).get("QTime"), r
+
+def decodificar_csv(conteudo):
+    # Uma linha por hit; passage_id com um único valor sai como texto simples
+    linhas = csv.reader(io.StringIO(conteudo.decode("utf-8")))
+    cabecalho = next(linhas, None)
+    resultados = Resultados()
+    if cabecalho is None:
+        return resultados, None, None
+    i_id, i_score = cabecalho.index("passage_id"), cabecalho.index("score")
+    for linha in linhas:
+        resultados.ids.append(linha[i_id])
+        resultados.scores.append(float(linha[i_score]))
+    return resultados, None, None
+
+DECODIFICADORES = {"json": decodificar_json, "csv": decodificar_csv}
+PARAMS_FORMATO = {"json": {"wt": "json", "echoParams": "none"}, "csv": {"wt": "csv", "csv.header": "true"}}
+
+def _get(sessao, solr_url, params, timeout):
+    resposta = sessao.get(solr_url, params=params, timeout=timeout)
+    if resposta.status_code >= 400:
+        raise ErroSolr(f"HTTP {resposta.status_code}: {resposta.text[:200]}", resposta.status_code)
+    return resposta.content
+
+class PrazoEsgotado(Exception):
+    # resultados: páginas do cursor já recebidas quando o prazo acabou
+    def __init__(self, mensagem, resultados=None):
+        super().__init__(mensagem)
+        self.resultados = resultados
+
+def _parcial(r):
+    # timeAllowed estourado: o Solr devolve o que achou até ali e marca partialResults
+    return bool(r and r.get("responseHeader", {}).get("partialResults"))
+
+def _consultar_com_cursor(sessao, solr_url, params, unique_key, por_pagina, timeout, prazo=None):
+    # Listas profundas: páginas de por_pagina hits com cursorMark; cada página é
+    # decodificada e descartada, só os arrays compactos crescem.
+    # Com prazo, o timeout é recalculado a cada página e, se o prazo acabar no meio
+    # da paginação, PrazoEsgotado leva as páginas já recebidas
+    rows = params["rows"]
+    pagina = {**params, **PARAMS_FORMATO["json"], "rows": por_pagina, "cursorMark": "*",
+              "sort": f"score desc,{unique_key} asc", "fl": f"{params['fl']},{unique_key}"}
+    resultados, qtime, parcial = Resultados(), None, False
+    while len(resultados) < rows:
+        pagina["rows"] = min(por_pagina, rows - len(resultados))
+        timeout_pagina = timeout
+        if prazo is not None:
+            restante = prazo - time.time()
+            if restante <= 0:
+                raise PrazoEsgotado(f"prazo total esgotado após {len(resultados)} hits do cursor", resultados)
+            timeout_pagina = min(timeout, restante)
+        try:
+            conteudo = _get(sessao, solr_url, pagina, timeout_pagina)
+        except requests.Timeout:
+            if resultados and timeout_pagina < timeout:
+                raise PrazoEsgotado(f"prazo total esgotado após {len(resultados)} hits do cursor", resultados)
+            raise
+        parte, qtime_pagina, r = decodificar_json(conteudo)
+        resultados.estender(parte)
+        parcial = parcial or _parcial(r)
+        if qtime_pagina is not None:
+            qtime = (qtime or 0) + qtime_pagina
+        proximo = r.get("nextCursorMark")
+        if not parte or proximo is None or proximo == pagina["cursorMark"]:
+            break
+        pagina["cursorMark"] = proximo
+    return resultados, qtime, parcial
+
+def executar_consulta(sessao, solr_url, params, formato=FORMATO, unique_key=UNIQUE_KEY, por_pagina=POR_PAGINA,
+                      timeout=TIMEOUT, time_allowed=None, prazo=None):
+    # Uma requisição (ou uma sequência de páginas): falhas HTTP e respostas sem
+    # 'response' viram ErroSolr; devolve também se o resultado veio parcial
+    start = time.time()
+    if time_allowed:
+        # partialResults só vem no cabeçalho do JSON
+        params = {**params, "timeAllowed": time_allowed}
+        formato = "json"
+    if params["rows"] > por_pagina:
+        docs, qtime, parcial = _consultar_com_cursor(sessao, solr_url, params, unique_key, por_pagina, timeout,
+                                                       prazo)
+    else:
+        conteudo = _get(sessao, solr_url, {**params, **PARAMS_FORMATO[formato]}, timeout)
+        docs, qtime, r = DECODIFICADORES[formato](conteudo)
+        parcial = _parcial(r)
+    return docs, time.time() - start, qtime, parcial
+
+
+# ---- Cliente resiliente: repetições, hedge e prazo total ----
+class ClienteConsultas:
+    # Cada consulta tem timeout por requisição, até 'tentativas' envios com backoff e
+    # jitter e, com hedge_percentil, uma segunda requisição igual quando a primeira
+    # passa do percentil das latências recentes (fica a resposta que chegar antes).
+    # Com prazo (instante absoluto, time.time()), nada é enviado depois dele e o
+    # timeout de cada requisição encolhe para caber no tempo restante.
+    def __init__(self, sessao, solr_url, timeout=TIMEOUT, time_allowed=None, tentativas=TENTATIVAS,
+                 hedge_percentil=None, prazo=None, **opcoes):
+        self.sessao = sessao
+        self.solr_url = solr_url
+        self.timeout = timeout
+        self.time_allowed = time_allowed
+        self.tentativas = tentativas
+        self.hedge_percentil = hedge_percentil
+        self.prazo = prazo
+        self.opcoes = opcoes  # formato, unique_key, por_pagina
+        self.latencias = deque(maxlen=JANELA_HEDGE)
+        self.hedges = 0
+
+    def _timeout(self):
+        if self.prazo is None:
+            return self.timeout
+        restante = self.prazo - time.time()
+        if restante <= 0:
+            raise PrazoEsgotado("prazo total da execução esgotado")
+        return min(self.timeout, restante)
+
+    def _tentativa(self, params):
+        resultado = executar_consulta(self.sessao, self.solr_url, params, timeout=self._timeout(),
+                                      time_allowed=self.time_allowed, prazo=self.prazo, **self.opcoes)
+        self.latencias.append(resultado[1])
+        return resultado
+
+    def limiar_hedge(self):
+        if not self.hedge_percentil or len(self.latencias) < AMOSTRAS_HEDGE:
+            return None
+        ordenadas = sorted(self.latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(self.hedge_percentil / 100 * len(ordenadas)))]
+
+    def _em_thread(self, params):
+        # Uma thread por requisição: a perdedora de um hedge termina sozinha (no máximo
+        # em timeout segundos) sem ocupar a vaga de consultas seguintes
+        futuro = Future()
+
+        def executar():
+            try:
+                futuro.set_result(self._tentativa(params))
+            except Exception as e:
+                futuro.set_exception(e)
+        threading.Thread(target=executar, daemon=True).start()
+        return futuro
+
+    def _com_hedge(self, params, registro):
+        limiar = self.limiar_hedge()
+        if limiar is None:
+            return self._tentativa(params)
+        primeira = self._em_thread(params)
+        try:
+            return primeira.result(timeout=limiar)
+        except FuturoAtrasado:
+            pass
+        registro["hedge"] = True
+        self.hedges += 1
+        segunda = self._em_thread(params)
+        prontas, _ = wait([primeira, segunda], return_when=FIRST_COMPLETED)
+        for futuro in prontas:
+            if futuro.exception() is None:
+                return futuro.result()
+        # A que terminou antes falhou: vale a outra
+        return (segunda if primeira in prontas else primeira).result()
+
+    def consultar(self, params):
+        # Nunca lança: devolve (docs, tempo, qtime, registro) e o status fica no registro
+        registro = {"status": "ok", "tentativas": 0, "hedge": False, "detalhe": ""}
+        start = time.time()
+
+        def tentar():
+            registro["tentativas"] += 1
+            return self._com_hedge(params, registro)
+
+        try:
+            docs, _, qtime, parcial = com_retentativas(
+                tentar, tentativas=self.tentativas, espera_base=ESPERA_BASE, espera_max=ESPERA_MAX,
+                repetir=lambda e: not isinstance(e, PrazoEsgotado) and repetivel(e), prazo=self.prazo)
+        except PrazoEsgotado as e:
+            if e.resultados:
+                # Lista profunda cortada pelo prazo: fica o que já tinha chegado
+                registro.update(status="parcial", detalhe=str(e))
+                return e.resultados, time.time() - start, None, registro
+            if registro["tentativas"] <= 1:
+                registro.update(status="nao_executada", tentativas=0)
+            else:
+                registro["status"] = "prazo_esgotado"
+            registro["detalhe"] = str(e)
+            return Resultados(), time.time() - start, None, registro
+        except requests.Timeout as e:
+            registro.update(status="timeout", detalhe=str(e)[:200])
+            return Resultados(), time.time() - start, None, registro
+        except Exception as e:
+            registro.update(status="erro", detalhe=f"{type(e).__name__}: {str(e)[:200]}")
+            return Resultados(), time.time() - start, None, registro
+        if parcial:
+            registro.update(status="parcial", detalhe=f"timeAllowed={self.time_allowed}ms")
+        return docs, time.time() - start, qtime, registro
+
+
+# ---- Cache de respostas ----
+def url_do_core(solr_url):
+    return solr_url.rstrip("/").rsplit("/", 1)[0]
+
+class CacheConsultas:
+    # Respostas chaveadas por core + versão do índice + parâmetros da consulta.
+    # Quando o core é reindexado a versão muda, e as entradas antigas são apagadas
+    def __init__(self, caminho=CACHE_CONSULTAS):
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("""CREATE TABLE IF NOT EXISTS respostas (
+            chave BLOB PRIMARY KEY, core TEXT NOT NULL, versao TEXT NOT NULL, docs TEXT NOT NULL)""")
+
+    def versao_indice(self, sessao, solr_url):
+        core = url_do_core(solr_url)
+        try:
+            r = sessao.get(f"{core}/admin/luke", params={"numTerms": 0, "wt": "json"}, timeout=30).json()
+            versao = str(r["index"]["version"])
+        except Exception as e:
+            print(f"⚠️ Versão do índice de {core} indisponível, cache desativado: {e}")
+            return None
+        with self.conexao:
+            self.conexao.execute("DELETE FROM respostas WHERE core = ? AND versao != ?", (core, versao))
+        return versao
+
+    @staticmethod
+    def chave(solr_url, versao, params):
+        texto = json.dumps([solr_url, versao, sorted(params.items())], ensure_ascii=False)
+        return hashlib.sha1(texto.encode("utf-8")).digest()
+
+    def buscar(self, solr_url, versao, params):
+        linha = self.conexao.execute("SELECT docs FROM respostas WHERE chave = ?",
+                                     (self.chave(solr_url, versao, params),)).fetchone()
+        return Resultados.de_pares(json.loads(linha[0])) if linha else None
+
+    def guardar(self, solr_url, versao, params, docs):
+        with self.conexao:
+            self.conexao.execute("INSERT OR REPLACE INTO respostas (chave, core, versao, docs) VALUES (?, ?, ?, ?)",
+                                 (self.chave(solr_url, versao, params), url_do_core(solr_url), versao,
+                                  json.dumps(list(docs), ensure_ascii=False)))
+
+    def fechar(self):
+        self.conexao.close()
+
+def _resolvido(valor):
+    futuro = Future()
+    futuro.set_result(valor)
+    return futuro
+
+
+def publicar(caminho, abortada=False):
+    # Os CSVs são escritos em <nome>.parcial e só ganham o nome definitivo quando a execução
+    # termina: uma execução abortada vira <nome>.abortada, longe dos avaliadores, e uma
+    # interrompida deixa intacto o resultado anterior
+    if caminho is None:
+        return None
+    destino = f"{caminho}.abortada" if abortada else caminho
+    os.replace(f"{caminho}.parcial", destino)
+    return destino
+
+def abrir_saida(output_csv):
+    # Sem output_csv (só avaliação contínua) nada é gravado em disco
+    if output_csv is None:
+        return contextlib.nullcontext(None), None
+    f = open(f"{output_csv}.parcial", "w", newline="", encoding="utf-8")
+    writer = csv.writer(f)
+    writer.writerow(["número_da_consulta", "número_do_documento", "ordem_no_ranking", "score"])
+    return f, writer
+
+def chave_metricas(output_csv, solr_url, campo):
+    return os.path.basename(output_csv) if output_csv else f"{url_do_core(solr_url)}#{campo}"
+
+def caminho_status(output_csv, arquivo_status=None):
+    # Status de cada consulta num CSV ao lado do principal, que mantém o formato de sempre
+    return arquivo_status or (f"{os.path.splitext(output_csv)[0]}.status.csv" if output_csv else None)
+
+def abrir_status(arquivo_status):
+    if arquivo_status is None:
+        return contextlib.nullcontext(None), None
+    f = open(f"{arquivo_status}.parcial", "w", newline="", encoding="utf-8")
+    writer = csv.writer(f)
+    writer.writerow(["número_da_consulta", "status", "tentativas", "hedge", "latencia_ms", "hits", "detalhe"])
+    return f, writer
+
+
+def consultar_solr(consultas, solr_url, output_csv, campo="passage", max_em_voo=MAX_EM_VOO, usar_cache=True,
+                   avaliacao=None, rows=ROWS, formato=FORMATO, unique_key=UNIQUE_KEY, por_pagina=POR_PAGINA,
+                   timeout=TIMEOUT, time_allowed=None, tentativas=TENTATIVAS, hedge_percentil=None,
+                   prazo_total=None, arquivo_status=None):
+    # avaliacao: AvaliacaoContinua opcional que avalia cada resposta ao chegar e pode abortar a execução
+    # rows > por_pagina: lista profunda buscada com cursorMark (ordenada por score e unique_key)
+    # time_allowed (ms): limite do Solr por consulta; hedge_percentil (ex.: 95): duplica requisições lentas
+    # prazo_total (s): duração máxima da execução; o que não coube é marcado como não executado
+    arquivo_status = caminho_status(output_csv, arquivo_status)
+    saida, writer = abrir_saida(output_csv)
+    saida_status, writer_status = abrir_status(arquivo_status)
+    with saida, saida_status, \
+            criar_sessao(max_em_voo) as sessao, \
+            ThreadPoolExecutor(max_workers=max_em_voo) as executor:
+        cache = CacheConsultas() if usar_cache else None
+        versao = cache.versao_indice(sessao, solr_url) if cache else None
+        if cache and versao is None:
+            cache.fechar()
+            cache = None
+        if avaliacao:
+            avaliacao.iniciar(len(consultas))
+
+        total_start = time.time()
+        cliente = ClienteConsultas(sessao, solr_url, timeout, time_allowed, tentativas, hedge_percentil,
+                                   total_start + prazo_total if prazo_total else None,
+                                   formato=formato, unique_key=unique_key, por_pagina=por_pagina)
+        pedidos = []
+        for _, query_text in consultas:
+            params = montar_params(query_text, campo, rows)
+            docs = cache.buscar(solr_url, versao, params) if cache else None
+            if docs is not None:
+                do_cache = {"status": "cache", "tentativas": 0, "hedge": False, "detalhe": ""}
+                pedidos.append((params, _resolvido((docs, 0.0, None, do_cache))))
+            else:
+                pedidos.append((params, executor.submit(cliente.consultar, params)))
+
+        latencias, qtimes = [], []
+        situacoes = Counter()
+        # Resultados escritos na ordem dos tópicos, não na ordem em que chegam
+        for n, ((query_id, _), (params, futuro)) in enumerate(zip(consultas, pedidos), start=1):
+            docs, tempo, qtime, registro = futuro.result()
+            status = registro["status"]
+            situacoes[status] += 1
+            if writer:
+                writer.writerows(zip(repeat(query_id), docs.ids, range(1, len(docs) + 1), docs.scores))
+            if writer_status:
+                writer_status.writerow([query_id, status, registro["tentativas"], int(registro["hedge"]),
+                                        round(tempo * 1000, 1), len(docs), registro["detalhe"]])
+            if status == "cache":
+                print(f"♻️ Consulta {query_id} ({campo}) reaproveitada do cache")
+            elif status in ("ok", "parcial"):
+                # Resultados parciais (timeAllowed) não vão para o cache
+                if cache and status == "ok":
+                    cache.guardar(solr_url, versao, params, docs)
+                latencias.append(tempo * 1000)
+                if qtime is not None:
+                    qtimes.append(qtime)
+                marca = " ⚠️ parcial" if status == "parcial" else ""
+                print(f"✅ Consulta {query_id} ({campo}) concluída em {tempo:.3f} segundos{marca}")
+            elif status != "nao_executada":
+                print(f"❌ Consulta {query_id} ({campo}) {status} após {registro['tentativas']} tentativa(s): "
+                      f"{registro['detalhe']}")
+            if avaliacao:
+                avaliacao.observar(query_id, docs, status)
+                if avaliacao.deve_abortar():
+                    for _, pendente in pedidos:
+                        pendente.cancel()
+                    restantes = consultas[n:]
+                    situacoes["nao_executada"] += len(restantes)
+                    if writer_status:
+                        writer_status.writerows([q, "nao_executada", 0, 0, "", 0, "execução abortada pela avaliação"]
+                                                for q, _ in restantes)
+                    break
+        total_end = time.time()
+        tempo_total = total_end - total_start
+        executadas = sum(situacoes.values()) - situacoes["nao_executada"]
+        print(f"\n⏱️ Tempo total de consulta [{campo}]: {tempo_total:.2f} segundos")
+        abortada = bool(avaliacao and avaliacao.abortada)
+        problemas = {k: v for k, v in situacoes.items() if k not in ("ok", "cache")}
+        if problemas:
+            print(f"⚠️ Consultas com problema: {', '.join(f'{k}={v}' for k, v in sorted(problemas.items()))}"
+                  + (f" (detalhes em {arquivo_status}{'.abortada' if abortada else ''})" if writer_status else ""))
+        if cliente.hedges:
+            print(f"🪁 Requisições duplicadas (hedge p{hedge_percentil}): {cliente.hedges}")
+        # Latência do cliente (ms, inclui rede e JSON) vs QTime do Solr; consultas vindas do cache ficam de fora
+        # Uma execução abortada não substitui as métricas da última execução completa
+        chave = f"consulta/{chave_metricas(output_csv, solr_url, campo)}" + (".abortada" if abortada else "")
+        ao_vivo = executadas - situacoes["cache"]
+        tempos = {
+            "tempo_total": tempo_total,
+            "qps": ao_vivo / tempo_total if ao_vivo and tempo_total > 0 else None,
+            "latencia_ms": percentis(latencias),
+            "qtime_ms": percentis(qtimes),
+        }
+        anterior = carregar_metricas().get(chave, {}) if situacoes["cache"] and not ao_vivo else {}
+        if anterior.get("tempo_total") is not None:
+            # Tudo veio do cache (mesma versão do índice): nada foi medido agora, o tempo anterior continua valendo.
+            # Execuções mistas ficam com as latências e o qps das consultas feitas ao vivo
+            tempos = {nome: anterior.get(nome) for nome in tempos}
+            print(f"ℹ️ Todas as consultas vieram do cache: tempos mantidos de {anterior.get('registrado_em')}")
+        metricas = {
+            "solr_url": solr_url,
+            "campo": campo,
+            "rows": rows,
+            "formato": formato if rows <= por_pagina else "json+cursorMark",
+            "consultas": executadas,
+            "ao_vivo": ao_vivo,
+            "do_cache": situacoes["cache"],
+            "status": dict(situacoes),
+            "hedges": cliente.hedges,
+            "max_em_voo": max_em_voo,
+            **tempos,
+        }
+        if avaliacao:
+            avaliacao.imprimir_resumo()
+            metricas["avaliacao"] = avaliacao.resumo()
+        registrar_metricas(chave, metricas)
+        if cache:
+            cache.fechar()
+    destino = publicar(output_csv, abortada)
+    publicar(arquivo_status, abortada)
+    if abortada and destino:
+        print(f"⛔ Resultados da execução abortada em {destino} (o CSV anterior foi mantido)")
@@ -0,0 +1,54 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from leitor_corpus import iterar_documentos, salvar_indice_linhas, caminho_indice
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+# Configurações
+JSON_FILE = 'quati_1M_passages.json'
+
+
+def linha_json(doc):
+    if orjson is not None:
+        return orjson.dumps(doc) + b"\n"
+    return (json.dumps(doc, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def converter(json_file, saida=None):
+    # Conversão única: array JSON -> JSONL (um documento por linha) + índice com o
+    # byte inicial de cada linha, usado pelos indexadores para dividir o arquivo em faixas
+    saida = saida or f"{os.path.splitext(json_file)[0]}.jsonl"
+    temporario = f"{saida}.{os.getpid()}.tmp"
+    inicio = time.time()
+    offsets = [0]
+    with open(temporario, "wb") as f:
+        for doc in iterar_documentos(json_file):
+            linha = linha_json(doc)
+            f.write(linha)
+            offsets.append(offsets[-1] + len(linha))
+            if (len(offsets) - 1) % 100000 == 0:
+                print(f"   {len(offsets) - 1} documentos convertidos...")
+    os.replace(temporario, saida)
+    salvar_indice_linhas(saida, np.array(offsets, dtype=np.int64))
+
+    print(f"✅ {len(offsets) - 1} documentos gravados em {saida} (índice em {caminho_indice(saida)}) "
+          f"em {time.time() - inicio:.2f}s")
+    return saida
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte o corpus JSON em JSONL com índice de offsets")
+    parser.add_argument("--json", default=JSON_FILE)
+    parser.add_argument("--saida", default=None, help="padrão: mesmo nome do corpus com extensão .jsonl")
+    args = parser.parse_args()
+
+    print(f"🔄 Convertendo {args.json} para JSONL...")
+    converter(args.json, args.saida)
@@ -0,0 +1,146 @@
+import hashlib
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict, deque
+
+import numpy as np
+
+TAMANHO_MEMORIA = 200000  # resultados de análise guardados por texto único
+NUM_PERMUTACOES = 64      # tamanho da assinatura MinHash
+BANDAS = 16               # bandas do LSH (NUM_PERMUTACOES / BANDAS linhas por banda)
+LIMITE_LSH = 200000       # assinaturas mantidas no índice LSH
+TAMANHO_SHINGLE = 3       # palavras por shingle
+
+_PRIMO = np.uint64(4294967311)  # primo > 2^32: a * x cabe em 64 bits
+_ESPACOS = re.compile(r"\s+")
+
+
+def normalizar(texto):
+    # Só mudanças que não alteram a análise: forma Unicode e espaços repetidos
+    return _ESPACOS.sub(" ", unicodedata.normalize("NFKC", texto)).strip()
+
+
+def chave_texto(texto):
+    return hashlib.blake2b(normalizar(texto).encode("utf-8"), digest_size=16).digest()
+
+
+# ---- Quase-duplicatas: MinHash + LSH ----
+class IndiceMinHash:
+    def __init__(self, limiar, num_permutacoes=NUM_PERMUTACOES, bandas=BANDAS, limite=LIMITE_LSH, semente=1):
+        assert num_permutacoes % bandas == 0
+        rng = np.random.default_rng(semente)
+        self.a = rng.integers(1, 1 << 32, size=(num_permutacoes, 1), dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=(num_permutacoes, 1), dtype=np.uint64)
+        self.limiar = limiar
+        self.bandas = bandas
+        self.linhas = num_permutacoes // bandas
+        self.limite = limite
+        self.baldes = [{} for _ in range(bandas)]  # banda -> {hash da banda: chave do representante}
+        self.assinaturas = {}                      # chave do representante -> assinatura
+        self.ordem = deque()
+
+    def assinar(self, textos):
+        # Assinaturas do lote inteiro de uma vez: todos os shingles num vetor só e
+        # o mínimo de cada permutação por documento com reduceat
+        shingles, inicios = [], []
+        for texto in textos:
+            palavras = normalizar(texto).lower().split() or [""]
+            n = max(1, len(palavras) - TAMANHO_SHINGLE + 1)
+            inicios.append(len(shingles))
+            shingles.extend(zlib.crc32(" ".join(palavras[i:i + TAMANHO_SHINGLE]).encode("utf-8")) for i in range(n))
+        x = np.asarray(shingles, dtype=np.uint64)
+        hashes = (self.a * x + self.b) % _PRIMO
+        return np.minimum.reduceat(hashes, np.asarray(inicios), axis=1).T
+
+    def _chaves_bandas(self, assinatura):
+        return [hash(assinatura[i * self.linhas:(i + 1) * self.linhas].tobytes()) for i in range(self.bandas)]
+
+    def representante(self, chave, assinatura):
+        # Devolve a chave do texto já visto parecido o bastante, ou registra este como novo
+        bandas = self._chaves_bandas(assinatura)
+        for banda, valor in zip(self.baldes, bandas):
+            candidato = banda.get(valor)
+            if candidato is not None and candidato != chave:
+                similaridade = np.mean(self.assinaturas[candidato] == assinatura)
+                if similaridade >= self.limiar:
+                    return candidato
+        if chave not in self.assinaturas:
+            self.assinaturas[chave] = assinatura
+            self.ordem.append((chave, bandas))
+            for banda, valor in zip(self.baldes, bandas):
+                banda.setdefault(valor, chave)
+            if len(self.ordem) > self.limite:
+                self._esquecer()
+        return chave
+
+    def _esquecer(self):
+        antiga, bandas = self.ordem.popleft()
+        del self.assinaturas[antiga]
+        for banda, valor in zip(self.baldes, bandas):
+            if banda.get(valor) == antiga:
+                del banda[valor]
+
+
+# ---- Etapa de deduplicação ----
+class Deduplicador:
+    # Analisa cada texto único uma vez e replica o resultado para todas as passagens
+    # que o repetem. Textos idênticos após normalizar() recebem exatamente a mesma
+    # análise; com limiar_minhash, quase-duplicatas (Jaccard estimado >= limiar)
+    # reaproveitam a análise do primeiro texto parecido visto.
+    def __init__(self, limiar_minhash=None, tamanho_memoria=TAMANHO_MEMORIA):
+        self.minhash = IndiceMinHash(limiar_minhash) if limiar_minhash else None
+        self.tamanho_memoria = tamanho_memoria
+        self.memoria = OrderedDict()  # chave -> resultado da análise
+        self.total = self.identicas = self.parecidas = self.analisadas = 0
+        self._trava = threading.Lock()
+
+    def _lembrar(self, chave, resultado):
+        self.memoria[chave] = resultado
+        self.memoria.move_to_end(chave)
+        if len(self.memoria) > self.tamanho_memoria:
+            self.memoria.popitem(last=False)
+
+    def analisar_unicos(self, textos, analisar):
+        chaves = [chave_texto(t) for t in textos]
+        assinaturas = self.minhash.assinar(textos) if self.minhash else None
+        resultados = [None] * len(textos)
+        pendentes = OrderedDict()  # chave -> índices que esperam a análise deste texto
+        with self._trava:
+            self.total += len(textos)
+            vistas = {}  # chave do texto -> chave sob a qual ele é analisado
+            for i, chave in enumerate(chaves):
+                if chave in vistas or chave in self.memoria:
+                    self.identicas += 1
+                    chave = vistas.setdefault(chave, chave)
+                elif self.minhash:
+                    representante = self.minhash.representante(chave, assinaturas[i])
+                    if representante != chave:
+                        self.parecidas += 1
+                    vistas[chave] = chave = representante
+                else:
+                    vistas[chave] = chave
+                if chave in self.memoria:
+                    self.memoria.move_to_end(chave)
+                    resultados[i] = self.memoria[chave]
+                else:
+                    pendentes.setdefault(chave, []).append(i)
+
+        unicos = [textos[indices[0]] for indices in pendentes.values()]
+        analisados = analisar(unicos) if unicos else []
+
+        with self._trava:
+            self.analisadas += len(unicos)
+            for (chave, indices), resultado in zip(pendentes.items(), analisados):
+                self._lembrar(chave, resultado)
+                for i in indices:
+                    resultados[i] = resultado
+        return resultados
+
+    def taxa(self):
+        return (self.identicas + self.parecidas) / self.total if self.total else 0.0
+
+    def resumo(self):
+        return (f"deduplicação: {self.taxa():.1%} das passagens repetidas ({self.identicas} idênticas, "
+                f"{self.parecidas} quase idênticas); {self.analisadas} de {self.total} textos analisados")
@@ -0,0 +1,177 @@
+import argparse
+import time
+from contextlib import ExitStack
+
+from leitor_corpus import NUM_LEITORES, carregar_lotes, preferir_jsonl
+from pipeline_indexacao import indexar_em_pipeline
+from instrumentacao import Cronometro, instrumentar_cliente
+from cliente_solr import ClienteSolrJSON
+from metricas_desempenho import chave_indexacao, registrar_metricas
+from checkpoint_indexacao import Checkpoint
+from ajuste_lotes import ControladorEnvio
+from deduplicacao import Deduplicador
+from manifesto_indexacao import Manifesto, definir_ids, impressao_analise
+
+# Configurações
+JSON_FILE = 'quati_1M_passages.json'
+BATCH_SIZE = 1000      # Tamanho inicial do lote de envio; ajustado durante a execução (ajuste_lotes.py)
+PERFIL_LOTE = None     # Número de um lote para perfilar com cProfile (None = desligado)
+LEITORES_COM_LEMA = 2  # Processos lendo o corpus em JSONL quando o spaCy ocupa os demais núcleos
+LIMIAR_QUASE_DUP = None  # Jaccard mínimo para reaproveitar o lema de uma quase-duplicata (ex.: 0.9); None = só idênticas
+
+# variante -> campo gerado no documento
+VARIANTES = {
+    "com_stem": "texto_com_stem",
+    "com_stop": "texto_com_stop",
+    "com_lema": "texto_com_lema",
+    "sem_lema": "texto_sem_lema",
+}
+
+# core -> variantes enviadas para ele
+ALVOS = {
+    'http://localhost:8983/solr/exemplo_stemming': ["com_stem"],
+    'http://localhost:8983/solr/exemplo_stopwords': ["com_stop"],
+    'http://localhost:8983/solr/exemplo_lema': ["com_lema", "sem_lema"],
+}
+
+
+# ---- Análise: cada variante é calculada uma única vez por lote ----
+def selecionar_delta(lote, deltas):
+    # Só seguem os documentos novos ou alterados em algum core; cada um leva em
+    # '_destinos' os índices dos cores (em 'alvos') que precisam recebê-lo
+    destinos = {}
+    for i, delta in enumerate(deltas):
+        for doc in delta.classificar(lote):
+            destinos.setdefault(id(doc), []).append(i)
+    selecionados = [doc for doc in lote if id(doc) in destinos]
+    for doc in selecionados:
+        doc['_destinos'] = destinos[id(doc)]
+    return selecionados
+
+
+def criar_analisador(variantes, pool_lema=None, dedup=None, deltas=None):
+    def analisar(lote):
+        if deltas:
+            lote = selecionar_delta(lote, deltas)
+        textos = [doc.get('passage', '') for doc in lote]
+        for variante in variantes:
+            campo = VARIANTES[variante]
+            if variante == "com_lema":
+                # Passagens repetidas são lematizadas uma vez só
+                valores = dedup.analisar_unicos(textos, pool_lema.lematizar) if dedup else pool_lema.lematizar(textos)
+            else:
+                # stem e stopwords são aplicados pelo próprio Solr no tipo do campo
+                valores = textos
+            for doc, valor in zip(lote, valores):
+                doc[campo] = valor
+        for doc in lote:
+            doc['passage_id'] = doc.get('passage_id', '')
+        return lote
+    return analisar
+
+
+def projetar(lote, variantes):
+    # Cada core recebe os campos originais mais apenas os campos das suas variantes
+    campos_fora = set(VARIANTES.values()) - {VARIANTES[v] for v in variantes} | {'_destinos'}
+    return [{k: v for k, v in doc.items() if k not in campos_fora} for doc in lote]
+
+
+def criar_envio(alvos, deltas=None):
+    def enviar(lote):
+        for i, (solr, variantes) in enumerate(alvos):
+            if not deltas:
+                solr.add(definir_ids(projetar(lote, variantes), VARIANTES[variantes[0]]), commit=False)
+                continue
+            docs = [doc for doc in lote if i in doc['_destinos']]
+            if docs:
+                deltas[i].enviar(projetar(docs, variantes), lambda parte: solr.add(parte, commit=False))
+            # Core já atendido: se outro core falhar, a nova tentativa não o reenvia
+            for doc in docs:
+                doc['_destinos'].remove(i)
+    return enviar
+
+
+def criar_delta(manifesto, solr, variantes, retomando=False):
+    campos = {VARIANTES[v]: "passage" for v in variantes}
+    analise = {}
+    if "com_lema" in variantes:
+        from lematizador import versao_modelo
+        analise = {"modelo": versao_modelo(), "limiar_quase_dup": LIMIAR_QUASE_DUP}
+    # O primeiro campo da variante identifica os documentos dela no core
+    return manifesto.delta(solr, VARIANTES[variantes[0]], impressao_analise(solr, campos, **analise), retomando)
+
+
+def indexar_variantes(variantes, json_file=JSON_FILE, alvos=ALVOS):
+    alvos = [(url, [v for v in vs if v in variantes]) for url, vs in alvos.items()]
+    alvos = [(ClienteSolrJSON(url, timeout=60), vs) for url, vs in alvos if vs]
+    rotulo = "+".join(variantes)
+    start_time = time.time()
+    cronometro = Cronometro(rotulo, perfil_lote=PERFIL_LOTE)
+    for solr, _ in alvos:
+        instrumentar_cliente(solr, cronometro)
+
+    # O corpus é lido e interpretado uma vez só para todas as variantes; os processos
+    # leitores são criados antes do pool do spaCy e das threads da pipeline
+    com_lema = "com_lema" in variantes
+    corpus = preferir_jsonl(json_file)
+    checkpoint = Checkpoint(rotulo, corpus)
+    ajuste = ControladorEnvio(BATCH_SIZE, rotulo=rotulo)
+
+    # Indexação incremental: cada core recebe só as passagens novas ou alteradas para ele
+    manifesto = Manifesto()
+    deltas = [criar_delta(manifesto, solr, vs, retomando=checkpoint.offset > 0) for solr, vs in alvos]
+    if checkpoint.offset and not all(delta.retomada for delta in deltas):
+        checkpoint.reiniciar("execução anterior não pode ser continuada pelo manifesto")
+    lotes = carregar_lotes(corpus, ajuste, pular=checkpoint.offset,
+                           processos=LEITORES_COM_LEMA if com_lema else NUM_LEITORES)
+
+    dedup = Deduplicador(LIMIAR_QUASE_DUP) if com_lema else None
+    with ExitStack() as stack:
+        pool_lema = None
+        if com_lema:
+            from lematizador import CacheLemas, PoolLematizacao
+            pool_lema = stack.enter_context(PoolLematizacao(cache=CacheLemas()))
+
+        total = indexar_em_pipeline(lotes, criar_analisador(variantes, pool_lema, dedup, deltas),
+                            criar_envio(alvos, deltas), rotulo=rotulo, num_analisadores=2 if pool_lema else 1,
+                            cronometro=cronometro, checkpoint=checkpoint, controlador=ajuste)
+    for delta in deltas:
+        delta.concluir()
+    manifesto.fechar()
+
+    commits_ok = True
+    for solr, _ in alvos:
+        try:
+            with cronometro.etapa("commit"):
+                solr.commit()
+            print(f"[{rotulo}] ✅ Commit final realizado em {solr.url}.")
+        except Exception as e:
+            commits_ok = False
+            print(f"[{rotulo}] ❌ Erro no commit final em {solr.url}: {e}")
+    if commits_ok:
+        checkpoint.concluir()
+
+    cronometro.relatorio()
+    tempo_total = time.time() - start_time
+    print(f"\n⏱️ Tempo de indexação [{rotulo}]: {tempo_total:.2f} segundos")
+    if dedup:
+        print(f"♻️ {dedup.resumo()}")
+    # Uma leitura serve todas as variantes: cada uma registra o tempo da execução conjunta
+    for variante in variantes:
+        delta = next(d for (_, vs), d in zip(alvos, deltas) if variante in vs)
+        metricas = {"docs": total, "tempo_total": tempo_total, "docs_por_segundo": total / tempo_total,
+                    "execucao_conjunta": variantes, "delta": delta.resumo()}
+        if dedup and variante == "com_lema":
+            metricas["taxa_duplicacao"] = dedup.taxa()
+        registrar_metricas(chave_indexacao(variante, delta.completa), metricas)
+
+
+# ---- Execução ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indexa várias variantes lendo o corpus uma única vez")
+    parser.add_argument("--variantes", nargs="+", choices=list(VARIANTES), default=list(VARIANTES))
+    parser.add_argument("--json", default=JSON_FILE)
+    args = parser.parse_args()
+
+    print(f"🔄 Iniciando indexação das variantes: {', '.join(args.variantes)}...")
+    indexar_variantes(args.variantes, args.json)
@@ -0,0 +1,149 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+PERFIL_LINHAS = 15  # funções mostradas no resumo do cProfile
+
+
+class Cronometro:
+    # Acumula o tempo de cada etapa da indexação (leitura, análise, serialização,
+    # http, commit...), no total e por lote, de forma segura entre threads
+    def __init__(self, rotulo, perfil_lote=None):
+        self.rotulo = rotulo
+        self.perfil_lote = perfil_lote  # número do lote a perfilar com cProfile (None = nenhum)
+        self.inicio = time.perf_counter()
+        self.tempos = defaultdict(list)  # etapa -> segundos de cada lote
+        self.docs = defaultdict(int)
+        self.trabalhadores = {}          # etapa -> threads (para calcular utilização)
+        self.por_lote = defaultdict(dict)
+        self._trava = threading.Lock()
+        self._local = threading.local()
+
+    # ---- Registro ----
+    def registrar(self, etapa, segundos, docs=0, lote=None):
+        lote = self.lote_atual() if lote is None else lote
+        with self._trava:
+            self.tempos[etapa].append(segundos)
+            self.docs[etapa] += docs
+            if lote is not None:
+                self.por_lote[lote][etapa] = self.por_lote[lote].get(etapa, 0.0) + segundos
+
+    @contextmanager
+    def etapa(self, nome, docs=0):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio, docs)
+
+    def lote_atual(self):
+        return getattr(self._local, "lote", None)
+
+    @contextmanager
+    def no_lote(self, numero):
+        # Marca a thread atual como processando o lote 'numero'
+        anterior, self._local.lote = self.lote_atual(), numero
+        try:
+            yield
+        finally:
+            self._local.lote = anterior
+
+    def medir(self, etapa, funcao, lote, numero):
+        # Executa funcao(lote) cronometrando a etapa; o lote sorteado passa pelo cProfile
+        with self.no_lote(numero):
+            perfil = cProfile.Profile() if numero == self.perfil_lote else None
+            inicio = time.perf_counter()
+            if perfil:
+                perfil.enable()
+            try:
+                return funcao(lote)
+            finally:
+                if perfil:
+                    perfil.disable()
+                self.registrar(etapa, time.perf_counter() - inicio, len(lote))
+                if perfil:
+                    self._salvar_perfil(perfil, etapa, numero)
+
+    def _salvar_perfil(self, perfil, etapa, numero):
+        nome = f"perfil_{self.rotulo}_lote{numero}_{etapa}.prof"
+        perfil.dump_stats(nome)
+        saida = io.StringIO()
+        pstats.Stats(perfil, stream=saida).sort_stats("cumulative").print_stats(PERFIL_LINHAS)
+        print(f"[{self.rotulo}] 🔬 Perfil do lote {numero} ({etapa}) salvo em {nome}\n{saida.getvalue()}")
+
+    # ---- Relatórios ----
+    def resumo_lote(self, numero):
+        with self._trava:
+            tempos = self.por_lote.pop(numero, {})
+        return ", ".join(f"{etapa} {segundos:.2f}s" for etapa, segundos in tempos.items())
+
+    def relatorio(self):
+        tempo_total = time.perf_counter() - self.inicio
+        print(f"\n📊 Tempo por etapa [{self.rotulo}] em {tempo_total:.2f}s:")
+        print(f"   {'etapa':<13}{'total':>9}{'utiliz.':>9}{'docs/s':>11}{'lote médio':>12}{'lote p95':>10}{'lote máx':>10}")
+        gargalo = max(self.trabalhadores, key=lambda e: self.utilizacao(e, tempo_total), default=None)
+        for etapa, tempos in list(self.tempos.items()):
+            if not tempos:
+                continue
+            ordenados = sorted(tempos)
+            total = sum(tempos)
+            docs_s = f"{self.docs[etapa] / total:,.0f}" if total > 0 and self.docs[etapa] else "-"
+            utilizacao = f"{self.utilizacao(etapa, tempo_total):.1%}" if etapa in self.trabalhadores else "-"
+            marca = "  ← gargalo" if etapa == gargalo else ""
+            print(f"   {etapa:<13}{total:>8.2f}s{utilizacao:>9}{docs_s:>11}{total / len(tempos):>11.3f}s"
+                  f"{ordenados[int(0.95 * (len(ordenados) - 1))]:>9.3f}s{ordenados[-1]:>9.3f}s{marca}")
+        return tempo_total
+
+    def utilizacao(self, etapa, tempo_total):
+        if tempo_total <= 0 or etapa not in self.trabalhadores:
+            return 0.0
+        return sum(self.tempos.get(etapa, ())) / (tempo_total * self.trabalhadores[etapa])
+
+
+# ---- Separação serialização x HTTP no envio ----
+def instrumentar_cliente(solr, cronometro):
+    # O ClienteSolrJSON já separa as duas etapas sozinho; o pysolr precisa ser embrulhado
+    if hasattr(solr, "cronometro"):
+        solr.cronometro = cronometro
+        return solr
+    return instrumentar_pysolr(solr, cronometro)
+
+
+def instrumentar_pysolr(solr, cronometro):
+    # Solr.add monta o XML em Python e depois chama _update para o POST:
+    # o tempo de _update é a parte HTTP, o restante do add é serialização
+    if getattr(solr, "_cronometro", None) is not None:
+        solr._cronometro = cronometro  # já instrumentado: só troca o cronômetro
+        return solr
+    solr._cronometro = cronometro
+    local = threading.local()
+    add_original = solr.add
+    update_original = solr._update
+
+    def _update(*args, **kwargs):
+        if not getattr(local, "em_add", False):
+            return update_original(*args, **kwargs)
+        inicio = time.perf_counter()
+        try:
+            return update_original(*args, **kwargs)
+        finally:
+            local.http += time.perf_counter() - inicio
+
+    def add(docs, *args, **kwargs):
+        local.em_add, local.http = True, 0.0
+        inicio = time.perf_counter()
+        try:
+            return add_original(docs, *args, **kwargs)
+        finally:
+            local.em_add = False
+            total = time.perf_counter() - inicio
+            solr._cronometro.registrar("serialização", total - local.http, len(docs))
+            solr._cronometro.registrar("http", local.http, len(docs))
+
+    solr._update = _update
+    solr.add = add
+    return solr
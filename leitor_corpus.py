@@ -0,0 +1,228 @@
+import json
+import multiprocessing
+import os
+import weakref
+from collections import deque
+from itertools import islice
+
+import numpy as np
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson é opcional
+    _loads = json.loads
+
+TAMANHO_BLOCO = 1 << 20  # caracteres lidos do arquivo por vez (~1 MiB)
+NUM_LEITORES = multiprocessing.cpu_count()  # processos interpretando faixas do JSONL
+BLOCO_INDICE = 64 << 20  # bytes varridos por vez ao indexar as linhas de um JSONL
+
+_decoder = json.JSONDecoder()
+_ESPACOS = " \t\r\n"
+
+
+# ---- Leitura de array JSON em streaming ----
+def _iterar_array_json(f, buffer):
+    # 'buffer' já começa no '[' de abertura
+    pos = 1
+    fim_arquivo = False
+    while True:
+        # pula espaços e vírgulas entre os elementos
+        while True:
+            while pos < len(buffer) and (buffer[pos] in _ESPACOS or buffer[pos] == ","):
+                pos += 1
+            if pos < len(buffer) or fim_arquivo:
+                break
+            buffer, pos = f.read(TAMANHO_BLOCO), 0
+            fim_arquivo = not buffer
+
+        if pos >= len(buffer):
+            raise ValueError("Array JSON terminou sem ']'")
+        if buffer[pos] == "]":
+            return
+
+        try:
+            obj, fim = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if fim_arquivo:
+                raise
+            # objeto cortado no fim do bloco: descarta o que já foi consumido e lê mais
+            bloco = f.read(TAMANHO_BLOCO)
+            fim_arquivo = not bloco
+            buffer, pos = buffer[pos:] + bloco, 0
+            continue
+
+        yield obj
+        pos = fim
+        if pos > TAMANHO_BLOCO:
+            buffer, pos = buffer[pos:], 0
+
+
+def _iterar_jsonl(f, primeira_parte):
+    resto = primeira_parte
+    for linha in f:
+        if resto:
+            linha, resto = resto + linha, ""
+        linha = linha.strip()
+        if linha:
+            yield json.loads(linha)
+    if resto.strip():
+        yield json.loads(resto)
+
+
+def iterar_documentos(caminho_arquivo):
+    # Aceita tanto um array JSON ([{...}, {...}]) quanto JSONL (um objeto por linha)
+    with open(caminho_arquivo, 'r', encoding='utf-8-sig') as f:
+        inicio = f.read(1)
+        while inicio and inicio in _ESPACOS:
+            inicio = f.read(1)
+        if not inicio:
+            return
+        if inicio == "[":
+            yield from _iterar_array_json(f, inicio)
+        else:
+            yield from _iterar_jsonl(f, inicio)
+
+
+def carregar_json_em_lotes(caminho_arquivo, batch_size, pular=0):
+    # 'pular' descarta os primeiros documentos (retomada a partir de um checkpoint);
+    # batch_size pode ser um número ou uma função consultada a cada lote (ajuste_lotes.py)
+    tamanho = batch_size if callable(batch_size) else (lambda: batch_size)
+    lote = []
+    limite = tamanho()
+    for doc in islice(iterar_documentos(caminho_arquivo), pular, None):
+        lote.append(doc)
+        if len(lote) >= limite:
+            yield lote
+            lote = []
+            limite = tamanho()
+    if lote:
+        yield lote
+
+
+# ---- JSONL com índice de offsets (ver converter_jsonl.py) ----
+def caminho_indice(caminho_jsonl):
+    return f"{caminho_jsonl}.idx.npy"
+
+
+def preferir_jsonl(caminho_arquivo):
+    # Usa a versão convertida (<corpus>.jsonl) quando ela existe ao lado do JSON original
+    base, extensao = os.path.splitext(caminho_arquivo)
+    if extensao != ".jsonl" and os.path.exists(f"{base}.jsonl"):
+        return f"{base}.jsonl"
+    return caminho_arquivo
+
+
+def indexar_linhas(caminho_jsonl):
+    # offsets[i] = byte onde começa o documento i; offsets[-1] = tamanho do arquivo.
+    # Linhas em branco ficam dentro da faixa do documento anterior e são ignoradas na leitura.
+    tamanho = os.path.getsize(caminho_jsonl)
+    if tamanho == 0:
+        return np.zeros(1, dtype=np.int64)
+    dados = np.memmap(caminho_jsonl, dtype=np.uint8, mode="r")
+    quebras = [np.flatnonzero(dados[i:i + BLOCO_INDICE] == ord("\n")) + i
+               for i in range(0, tamanho, BLOCO_INDICE)]  # em blocos, para não criar uma máscara do arquivo todo
+    inicios = np.concatenate([[0]] + [q + 1 for q in quebras]).astype(np.int64)
+    fins = np.append(inicios[1:] - 1, tamanho)
+    conteudo = fins - inicios > 0
+    conteudo &= ~((fins - inicios == 1) & (dados[np.minimum(inicios, tamanho - 1)] == ord("\r")))
+    del dados
+    return np.append(inicios[conteudo], tamanho)
+
+
+def carregar_indice_linhas(caminho_jsonl):
+    # Reaproveita o índice salvo se ele for mais novo que o JSONL e cobrir o arquivo inteiro
+    indice = caminho_indice(caminho_jsonl)
+    if os.path.exists(indice) and os.path.getmtime(indice) >= os.path.getmtime(caminho_jsonl):
+        offsets = np.load(indice, mmap_mode="r")
+        if len(offsets) and offsets[-1] == os.path.getsize(caminho_jsonl):
+            return offsets
+    offsets = indexar_linhas(caminho_jsonl)
+    salvar_indice_linhas(caminho_jsonl, offsets)
+    return offsets
+
+
+def salvar_indice_linhas(caminho_jsonl, offsets):
+    indice = caminho_indice(caminho_jsonl)
+    temporario = f"{indice}.{os.getpid()}.tmp.npy"
+    np.save(temporario, np.asarray(offsets, dtype=np.int64))
+    os.replace(temporario, indice)
+
+
+def ler_faixa(caminho_jsonl, inicio, fim, analisar=None):
+    # Executado nos processos leitores: interpreta só os bytes [inicio, fim)
+    with open(caminho_jsonl, "rb") as f:
+        f.seek(inicio)
+        dados = f.read(fim - inicio)
+    if inicio == 0 and dados.startswith(b"\xef\xbb\xbf"):
+        dados = dados[3:]
+    lote = [_loads(linha) for linha in dados.split(b"\n") if linha.strip()]
+    return analisar(lote) if analisar else lote
+
+
+def carregar_jsonl_em_paralelo(caminho_jsonl, batch_size, pular=0, processos=NUM_LEITORES, analisar=None):
+    # Cada lote é uma faixa de bytes alinhada em linhas, lida e interpretada (e, se
+    # 'analisar' for dado, analisada) por um processo. Os lotes voltam na ordem do
+    # corpus, então checkpoint e contagem de offsets continuam valendo.
+    # 'analisar' precisa ser uma função de módulo (é enviada aos processos por pickle).
+    offsets = carregar_indice_linhas(caminho_jsonl)
+    total = len(offsets) - 1
+    tamanho = batch_size if callable(batch_size) else (lambda: batch_size)
+    # O pool é criado já na chamada, antes de a pipeline abrir suas threads
+    pool = multiprocessing.Pool(processes=processos)
+    return LotesEmParalelo(pool, _lotes_em_paralelo(pool, caminho_jsonl, offsets, total, tamanho, pular,
+                                                    processos, analisar))
+
+
+class LotesEmParalelo:
+    # Iterável de lotes dono do pool de leitores: close() (ou o with) encerra os processos
+    # mesmo que a iteração nunca tenha começado, caso em que o finally do gerador não roda
+    def __init__(self, pool, lotes):
+        self.pool = pool
+        self._lotes = lotes
+        self._finalizar = weakref.finalize(self, pool.terminate)
+
+    def __iter__(self):
+        return self._lotes
+
+    def close(self):
+        try:
+            self._lotes.close()
+        except ValueError:
+            pass  # gerador ainda em execução na thread de leitura: encerrar o pool basta
+        finally:
+            if self._finalizar.detach():
+                self.pool.terminate()
+                self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.close()
+
+
+def _lotes_em_paralelo(pool, caminho_jsonl, offsets, total, tamanho, pular, processos, analisar):
+    try:
+        em_voo = deque()
+        posicao = min(pular, total)
+        while posicao < total or em_voo:
+            # Mantém cada processo com até dois lotes à frente do consumidor
+            while posicao < total and len(em_voo) < 2 * processos:
+                fim = min(total, posicao + tamanho())
+                em_voo.append(pool.apply_async(ler_faixa, (caminho_jsonl, int(offsets[posicao]),
+                                                           int(offsets[fim]), analisar)))
+                posicao = fim
+            yield em_voo.popleft().get()
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def carregar_lotes(caminho_arquivo, batch_size, pular=0, processos=NUM_LEITORES, analisar=None):
+    # JSONL é lido em paralelo por faixas; o JSON em array segue pelo leitor sequencial
+    if caminho_arquivo.endswith(".jsonl") and processos > 1:
+        return carregar_jsonl_em_paralelo(caminho_arquivo, batch_size, pular, processos, analisar)
+    lotes = carregar_json_em_lotes(caminho_arquivo, batch_size, pular)
+    return map(analisar, lotes) if analisar else lotes
@@ -2,17 +2,27 @@ import csv
 from collections import defaultdict
 from sklearn.metrics import average_precision_score
 from scipy.stats import ttest_rel
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cache_avaliacao import consultas_com_falha
+from metricas_desempenho import carregar_metricas, desempenho_da_execucao, diferenca, formatar
+from significancia import formatar_teste, testes_pareados
 
 # === ARQUIVOS ===
-arquivo_com = "resultados_com_stem.csv"
-arquivo_sem = "resultados_sem_stem.csv"
+arquivo_com = "resultados_com_lema.csv"
+arquivo_sem = "resultados_sem_lema.csv"
 arquivo_qrels = "quati_1M_qrels.txt"
 
-# === TEMPOS DESEMPENHO (em segundos) ===
-tempo_index_com = 376.63
-tempo_index_sem = 361.10
-tempo_consulta_com = 108.62
-tempo_consulta_sem = 106.89
+# === DESEMPENHO (medido pelos indexadores e pelo consultar_solr) ===
+metricas = carregar_metricas()
+desempenho_com = desempenho_da_execucao(arquivo_com, metricas)
+desempenho_sem = desempenho_da_execucao(arquivo_sem, metricas)
+tempo_index_com = desempenho_com["tempo_index"]
+tempo_index_sem = desempenho_sem["tempo_index"]
+tempo_consulta_com = desempenho_com["tempo_consulta"]
+tempo_consulta_sem = desempenho_sem["tempo_consulta"]
 
 # === Carregar qrels ===
 def carregar_qrels(qrels_path):
@@ -58,6 +68,9 @@ res_sem = carregar_resultados(arquivo_sem)
 
 ap_com = calcular_ap_por_consulta(res_com, qrels)
 ap_sem = calcular_ap_por_consulta(res_sem, qrels)
+# Consultas que falharam no consultar_solr (sem linhas no CSV) contam como AP = 0
+ap_com.update({str(c): 0.0 for c in consultas_com_falha(arquivo_com) if str(c) in qrels})
+ap_sem.update({str(c): 0.0 for c in consultas_com_falha(arquivo_sem) if str(c) in qrels})
 
 # Alinhar consultas que estão em ambos
 consultas_comuns = set(ap_com.keys()) & set(ap_sem.keys())
@@ -71,20 +84,26 @@ map_sem = sum(lista_ap_sem) / len(lista_ap_sem)
 # === Teste T pareado com AP ===
 t_stat, p_value = ttest_rel(lista_ap_com, lista_ap_sem)
 
+# === Aleatorização pareada e bootstrap do MAP (sem - com) ===
+significancia = testes_pareados(lista_ap_sem, lista_ap_com)
+
 # === Relatório ===
 print("\n📊 COMPARAÇÃO COM BASE EM AVERAGE PRECISION (AP)")
 print("-" * 45)
-print(f"🔎 MAP com stemming     : {map_com:.6f}")
-print(f"🔎 MAP sem stemming     : {map_sem:.6f}")
+print(f"🔎 MAP com lematização     : {map_com:.6f}")
+print(f"🔎 MAP sem lematização     : {map_sem:.6f}")
 print(f"📈 Diferença de MAP     : {map_sem - map_com:.6f}")
 print()
-print(f"⏱️ Tempo de indexação com stemming : {tempo_index_com:.2f}s")
-print(f"⏱️ Tempo de indexação sem stemming : {tempo_index_sem:.2f}s")
-print(f"📉 Diferença (indexação)           : {tempo_index_sem - tempo_index_com:.2f}s")
+print(f"⏱️ Tempo de indexação com lematização : {formatar(tempo_index_com)}")
+print(f"⏱️ Tempo de indexação sem lematização : {formatar(tempo_index_sem)}")
+print(f"📉 Diferença (indexação)           : {diferenca(tempo_index_com, tempo_index_sem)}")
 print()
-print(f"⏱️ Tempo de consulta com stemming : {tempo_consulta_com:.2f}s")
-print(f"⏱️ Tempo de consulta sem stemming : {tempo_consulta_sem:.2f}s")
-print(f"📉 Diferença (consulta)           : {tempo_consulta_sem - tempo_consulta_com:.2f}s")
+print(f"⏱️ Tempo de consulta com lematização : {formatar(tempo_consulta_com)}")
+print(f"⏱️ Tempo de consulta sem lematização : {formatar(tempo_consulta_sem)}")
+print(f"📉 Diferença (consulta)           : {diferenca(tempo_consulta_com, tempo_consulta_sem)}")
+print(f"🚀 QPS com / sem lematização           : {formatar(desempenho_com['qps'], '')} / {formatar(desempenho_sem['qps'], '')}")
+print(f"📶 Latência p95 com / sem lematização  : {formatar(desempenho_com['latencia_p95'], 'ms')} / "
+      f"{formatar(desempenho_sem['latencia_p95'], 'ms')}")
 print()
 print(f"🧪 Teste T pareado (AP por consulta)")
 print(f"   t = {t_stat:.6f}")
@@ -93,3 +112,6 @@ if p_value < 0.05:
     print("✅ Diferença estatisticamente significativa (p < 0.05)")
 else:
     print("❌ Diferença não significativa (p ≥ 0.05)")
+print()
+print(f"🎲 Aleatorização pareada e bootstrap ({significancia['reamostras']} reamostras, sem - com)")
+print("   " + formatar_teste("MAP", significancia, significancia["confianca"]))
@@ -1,73 +1,103 @@
 import requests
-import pysolr
-import json
 import time
-import spacy
-import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from leitor_corpus import carregar_lotes, preferir_jsonl
+from pipeline_indexacao import indexar_em_pipeline
+from instrumentacao import Cronometro, instrumentar_cliente
+from cliente_solr import ClienteSolrJSON
+from metricas_desempenho import chave_indexacao, registrar_metricas
+from lematizador import CacheLemas, PoolLematizacao, versao_modelo
+from checkpoint_indexacao import Checkpoint
+from ajuste_lotes import ControladorEnvio
+from deduplicacao import Deduplicador
+from manifesto_indexacao import Manifesto, impressao_analise
 
 # Configurações
 SOLR_URL = 'http://localhost:8983/solr/exemplo_lema'
 JSON_FILE = 'quati_1M_passages.json'
-BATCH_SIZE = 1000      # Número de docs enviados ao Solr por vez
-LEMA_BATCH = 100       # Número de textos lematizados por processo por vez
-NUM_PROCESSES = multiprocessing.cpu_count()  # Número de núcleos (ajuste se quiser)
+BATCH_SIZE = 1000      # Tamanho inicial do lote de envio; ajustado durante a execução (ajuste_lotes.py)
+PERFIL_LOTE = None     # Número de um lote para perfilar com cProfile (None = desligado)
+LEITORES = 2           # Processos lendo o corpus em JSONL; os demais núcleos ficam com o spaCy
+LIMIAR_QUASE_DUP = None  # Jaccard mínimo para reaproveitar o lema de uma quase-duplicata (ex.: 0.9); None = só idênticas
 
 # Inicia Solr
-solr = pysolr.Solr(SOLR_URL, timeout=60)
-
-# ---- Multiprocessing Worker ----
-def worker_lemmatizer(textos):
-    nlp = spacy.load("pt_core_news_sm")
-    result = [" ".join([token.lemma_ for token in doc]) for doc in nlp.pipe(textos, batch_size=32)]
-    return result
+solr = ClienteSolrJSON(SOLR_URL, timeout=60)
 
-def lemmatize_parallel(lista_textos, num_processes=NUM_PROCESSES, batch_size=LEMA_BATCH):
-    # Divide os textos em chunks menores para cada worker
-    chunks = [lista_textos[i:i+batch_size] for i in range(0, len(lista_textos), batch_size)]
-    lematizados = []
-    with multiprocessing.Pool(processes=num_processes) as pool:
-        for result in pool.imap(worker_lemmatizer, chunks):
-            lematizados.extend(result)
-    return lematizados
+# ---- Indexação ----
+def enviar_lote(lote):
+    solr.add(lote, commit=False)
 
-# ---- Funções de leitura e indexação ----
-def carregar_json_em_lotes(caminho_arquivo, batch_size):
-    with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-        documentos = json.load(f)
-        for i in range(0, len(documentos), batch_size):
-            yield documentos[i:i + batch_size]
+def sem_lema(lote):
+    for doc in lote:
+        doc['texto_sem_lema'] = doc.get('passage', '')
+    return lote
 
 def indexar(tipo):
     total = 0
+    dedup = None
     start_time = time.time()
+    cronometro = Cronometro(tipo, perfil_lote=PERFIL_LOTE)
+    instrumentar_cliente(solr, cronometro)
+    corpus = preferir_jsonl(JSON_FILE)
+    checkpoint = Checkpoint(tipo, corpus)
+    ajuste = ControladorEnvio(BATCH_SIZE, rotulo=tipo)
+
+    # Indexação incremental: só passagens novas ou alteradas desde a última execução
+    # (ou todas, se o modelo, a deduplicação ou o schema mudaram) são analisadas e enviadas
+    campo = f"texto_{tipo}"
+    analise = {"modelo": versao_modelo(), "limiar_quase_dup": LIMIAR_QUASE_DUP} if tipo == "com_lema" else {}
+    manifesto = Manifesto()
+    delta = manifesto.delta(solr, campo, impressao_analise(solr, {campo: "passage"}, **analise),
+                            retomando=checkpoint.offset > 0)
+    if checkpoint.offset and not delta.retomada:
+        checkpoint.reiniciar("execução anterior não pode ser continuada pelo manifesto")
+    lotes = carregar_lotes(corpus, ajuste, pular=checkpoint.offset, processos=LEITORES)
 
-    for lote in carregar_json_em_lotes(JSON_FILE, BATCH_SIZE):
-        passage_texts = [doc.get('passage', '') for doc in lote]
+    def enviar_delta(lote):
+        delta.enviar(lote, enviar_lote)
 
-        if tipo == "com_lema":
-            # Lematização paralela!
-            lematizados = lemmatize_parallel(passage_texts)
-            for doc, lema in zip(lote, lematizados):
-                doc['texto_com_lema'] = lema
-        elif tipo == "sem_lema":
-            for doc in lote:
-                doc['texto_sem_lema'] = doc.get('passage', '')
+    if tipo == "com_lema":
+        # Pool único para a execução inteira: o modelo é carregado uma vez por processo,
+        # passagens já lematizadas em execuções anteriores vêm do cache e passagens
+        # repetidas (boilerplate do ClueWeb) são lematizadas uma vez só
+        dedup = Deduplicador(LIMIAR_QUASE_DUP)
+        with PoolLematizacao(cache=CacheLemas()) as pool:
+            def com_lema(lote):
+                lote = delta.classificar(lote)
+                lematizados = dedup.analisar_unicos([doc.get('passage', '') for doc in lote], pool.lematizar)
+                for doc, lema in zip(lote, lematizados):
+                    doc['texto_com_lema'] = lema
+                return lote
 
-        try:
-            solr.add(lote, commit=False)
-            total += len(lote)
-            print(f"[{tipo}] {total} documentos indexados...")
-        except Exception as e:
-            print(f"[{tipo}] ❌ Erro ao indexar lote: {e}")
+            # Duas threads de análise mantêm o pool ocupado enquanto um lote é remontado
+            total = indexar_em_pipeline(lotes, com_lema, enviar_delta, rotulo=tipo, num_analisadores=2,
+                                        cronometro=cronometro, checkpoint=checkpoint, controlador=ajuste)
+    elif tipo == "sem_lema":
+        total = indexar_em_pipeline(lotes, lambda lote: sem_lema(delta.classificar(lote)), enviar_delta,
+                                    rotulo=tipo, cronometro=cronometro, checkpoint=checkpoint, controlador=ajuste)
+    delta.concluir()
+    manifesto.fechar()
 
     try:
-        solr.commit()
+        with cronometro.etapa("commit"):
+            solr.commit()
+        checkpoint.concluir()
         print(f"[{tipo}] ✅ Commit final realizado.")
     except Exception as e:
         print(f"[{tipo}] ❌ Erro no commit final: {e}")
 
+    cronometro.relatorio()
     tempo_total = time.time() - start_time
     print(f"\n⏱️ Tempo de indexação [{tipo}]: {tempo_total:.2f} segundos")
+    metricas = {"solr_url": SOLR_URL, "docs": total, "tempo_total": tempo_total, "docs_por_segundo": total / tempo_total,
+                "delta": delta.resumo()}
+    if dedup:
+        print(f"♻️ {dedup.resumo()}")
+        metricas["taxa_duplicacao"] = dedup.taxa()
+    registrar_metricas(chave_indexacao(tipo, delta.completa), metricas)
 
 # ---- Execução ----
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+import hashlib
+import multiprocessing
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import spacy
+
+from ajuste_lotes import ControladorAnalise
+
+MODELO = "pt_core_news_sm"
+LEMA_BATCH = 100       # Textos por tarefa (fixo, ou só o ponto de partida do ajuste adaptativo)
+NUM_PROCESSES = multiprocessing.cpu_count()
+
+# O lemmatizer do pt_core_news_sm só depende de tok2vec, morphologizer e
+# attribute_ruler; parser e ner não mudam os lemas e são os componentes mais caros
+COMPONENTES_EXCLUIDOS = ["parser", "ner"]
+
+CACHE_LEMAS = "lemas_cache.sqlite"
+TAMANHO_LRU = 100000   # passagens lematizadas mantidas em memória
+
+_nlp = None  # modelo carregado uma única vez em cada processo do pool
+
+
+# ---- Funções executadas nos processos do pool ----
+def iniciar_worker(modelo=MODELO):
+    global _nlp
+    _nlp = spacy.load(modelo, exclude=COMPONENTES_EXCLUIDOS)
+
+
+def worker_lemmatizer(textos):
+    return [" ".join([token.lemma_ for token in doc]) for doc in _nlp.pipe(textos, batch_size=32)]
+
+
+def worker_lemmatizer_medido(textos):
+    # Devolve também o tempo gasto no worker, sem a fila e o IPC, para o ajuste das tarefas
+    inicio = time.perf_counter()
+    return worker_lemmatizer(textos), time.perf_counter() - inicio
+
+
+# ---- Cache de lemas ----
+def versao_modelo(modelo=MODELO):
+    # Lemas só são reaproveitados se modelo, versão e componentes forem os mesmos
+    return f"{modelo}-{spacy.util.get_package_version(modelo)}-spacy{spacy.__version__}-sem:{','.join(COMPONENTES_EXCLUIDOS)}"
+
+
+class CacheLemas:
+    # O lema de um token depende da classe gramatical que o spaCy atribui no
+    # contexto, então o cache guarda a passagem inteira lematizada, chaveada pelo
+    # hash do texto + versão do modelo: LRU em memória na frente de um SQLite em disco
+    def __init__(self, caminho=CACHE_LEMAS, versao=None, tamanho_lru=TAMANHO_LRU):
+        self.versao = versao or versao_modelo()
+        self.tamanho_lru = tamanho_lru
+        self.lru = OrderedDict()
+        self.acertos_memoria = self.acertos_disco = self.faltas = 0
+        self._trava = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("CREATE TABLE IF NOT EXISTS lemas (chave BLOB PRIMARY KEY, lema TEXT NOT NULL)")
+
+    def chave(self, texto):
+        return hashlib.sha1(f"{self.versao}\0{texto}".encode("utf-8")).digest()
+
+    def _lembrar(self, chave, lema):
+        self.lru[chave] = lema
+        self.lru.move_to_end(chave)
+        if len(self.lru) > self.tamanho_lru:
+            self.lru.popitem(last=False)
+
+    def buscar(self, textos):
+        # Devolve os lemas encontrados (None nos demais) e os índices que faltam
+        chaves = [self.chave(t) for t in textos]
+        lemas = [None] * len(textos)
+        with self._trava:
+            no_disco = []
+            for i, chave in enumerate(chaves):
+                lema = self.lru.get(chave)
+                if lema is None:
+                    no_disco.append(i)
+                else:
+                    self.lru.move_to_end(chave)
+                    lemas[i] = lema
+            self.acertos_memoria += len(textos) - len(no_disco)
+
+            encontrados = {}
+            for j in range(0, len(no_disco), 500):
+                parte = [chaves[i] for i in no_disco[j:j + 500]]
+                marcadores = ",".join("?" * len(parte))
+                encontrados.update(self.conexao.execute(
+                    f"SELECT chave, lema FROM lemas WHERE chave IN ({marcadores})", parte))
+            faltando = []
+            for i in no_disco:
+                lema = encontrados.get(chaves[i])
+                if lema is None:
+                    faltando.append(i)
+                else:
+                    lemas[i] = lema
+                    self._lembrar(chaves[i], lema)
+            self.acertos_disco += len(no_disco) - len(faltando)
+            self.faltas += len(faltando)
+        return lemas, faltando
+
+    def guardar(self, textos, lemas):
+        registros = [(self.chave(t), l) for t, l in zip(textos, lemas)]
+        with self._trava:
+            with self.conexao:
+                self.conexao.executemany("INSERT OR REPLACE INTO lemas (chave, lema) VALUES (?, ?)", registros)
+            for chave, lema in registros:
+                self._lembrar(chave, lema)
+
+    def resumo(self):
+        total = self.acertos_memoria + self.acertos_disco + self.faltas
+        taxa = (self.acertos_memoria + self.acertos_disco) / total if total else 0.0
+        return (f"cache de lemas: {taxa:.1%} reaproveitado ({self.acertos_memoria} memória, "
+                f"{self.acertos_disco} disco, {self.faltas} lematizados)")
+
+    def fechar(self):
+        self.conexao.close()
+
+
+# ---- Pool persistente ----
+class PoolLematizacao:
+    def __init__(self, num_processes=NUM_PROCESSES, batch_size=LEMA_BATCH, modelo=MODELO, cache=None,
+                 adaptativo=True):
+        self.batch_size = batch_size
+        self.num_processes = num_processes
+        self.ajuste = ControladorAnalise(batch_size) if adaptativo else None
+        self.cache = cache
+        self.pool = multiprocessing.Pool(processes=num_processes, initializer=iniciar_worker, initargs=(modelo,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        self.pool.close()
+        self.pool.join()
+        if self.cache:
+            print(f"♻️ {self.cache.resumo()}")
+            self.cache.fechar()
+
+    def _submeter(self, textos):
+        # Só os textos ausentes do cache vão para os workers
+        if self.cache:
+            lemas, faltando = self.cache.buscar(textos)
+        else:
+            lemas, faltando = [None] * len(textos), list(range(len(textos)))
+        a_lematizar = [textos[i] for i in faltando]
+        if self.ajuste:
+            partes = self.ajuste.dividir(a_lematizar, self.num_processes)
+        else:
+            partes = [a_lematizar[i:i + self.batch_size] for i in range(0, len(a_lematizar), self.batch_size)]
+        tarefas = [(sum(len(t) for t in parte), self.pool.apply_async(worker_lemmatizer_medido, (parte,)))
+                   for parte in partes]
+        return lemas, faltando, a_lematizar, tarefas
+
+    def _coletar(self, pendente):
+        lemas, faltando, a_lematizar, tarefas = pendente
+        lematizados = []
+        for chars, tarefa in tarefas:
+            lemas_tarefa, segundos = tarefa.get()
+            lematizados.extend(lemas_tarefa)
+            if self.ajuste:
+                self.ajuste.observar(chars, segundos)
+        for i, lema in zip(faltando, lematizados):
+            lemas[i] = lema
+        if self.cache and lematizados:
+            self.cache.guardar(a_lematizar, lematizados)
+        return lemas
+
+    def lematizar(self, textos):
+        return self._coletar(self._submeter(textos))
+
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import sqlite3
+import threading
+
+MANIFESTO = "manifesto_indexacao.sqlite"
+IDS_POR_EXCLUSAO = 500  # passage_ids por delete-by-query (abaixo do maxBooleanClauses do Solr)
+
+
+def id_da_passagem(doc):
+    # O Solr sem schema guarda passage_id como lista; o manifesto usa o valor simples
+    valor = doc.get("passage_id", "")
+    return str(valor[0] if isinstance(valor, list) and valor else valor)
+
+
+def definir_ids(lote, campo):
+    # uniqueKey estável: reenviar um lote (retentativa depois de um timeout que o Solr já
+    # tinha aplicado, lotes confirmados fora de ordem após o offset do checkpoint) substitui
+    # os documentos em vez de duplicá-los. O campo da variante entra no id porque um core
+    # pode guardar documentos de variantes diferentes (exemplo_lema: com_lema e sem_lema)
+    for doc in lote:
+        doc["id"] = f"{campo}:{id_da_passagem(doc)}"
+    return lote
+
+
+def hash_conteudo(doc):
+    # Só os campos vindos do corpus: o hash é o mesmo antes e depois da análise
+    conteudo = json.dumps([doc.get("passage_id", ""), doc.get("passage", "")], ensure_ascii=False)
+    return hashlib.sha1(conteudo.encode("utf-8")).digest()
+
+
+def impressao_analise(cliente, campos, **analise):
+    # Impressão digital de tudo que muda o que vai para o índice: campos gerados, a
+    # análise feita em Python (modelo do spaCy, deduplicação...) e os tipos dos campos
+    # no schema do core, com seus analisadores (stemmer, stopwords...)
+    # "chave": documentos indexados antes da uniqueKey estável (ids gerados pelo Solr) são apagados uma vez
+    config = {"campos": campos, "analise": analise, "chave": "campo:passage_id",
+              "tipos": {campo: cliente.tipo_do_campo(campo) for campo in campos}}
+    return hashlib.sha1(json.dumps(config, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _frase(valor):
+    return '"' + valor.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class Manifesto:
+    # Registro, por core e variante, do hash de conteúdo de cada passagem já indexada
+    # e da impressão da análise usada, para reindexar só o que mudou
+    def __init__(self, caminho=MANIFESTO):
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("CREATE TABLE IF NOT EXISTS passagens (escopo TEXT, passage_id TEXT, hash BLOB, "
+                             "execucao INTEGER, PRIMARY KEY (escopo, passage_id)) WITHOUT ROWID")
+        self.conexao.execute("CREATE TABLE IF NOT EXISTS escopos (escopo TEXT PRIMARY KEY, impressao TEXT, "
+                             "execucao INTEGER, em_andamento INTEGER, impressao_em_andamento TEXT)")
+        self.trava = threading.Lock()
+
+    def delta(self, cliente, campo, impressao, retomando=False):
+        return DeltaCore(self, cliente, campo, impressao, retomando)
+
+    def fechar(self):
+        self.conexao.close()
+
+
+class DeltaCore:
+    # Delta de uma variante (documentos que têm 'campo') em um core:
+    #  - impressão da análise diferente da última: a variante é apagada do core e reindexada inteira;
+    #  - senão, só vão ao Solr passagens novas ou com conteúdo alterado (a versão antiga
+    #    é apagada antes) e, ao final, as que sumiram do corpus são removidas.
+    def __init__(self, manifesto, cliente, campo, impressao, retomando=False):
+        self.manifesto = manifesto
+        self.conexao = manifesto.conexao
+        self.trava = manifesto.trava
+        self.cliente = cliente
+        self.escopo = f"{cliente.url}#{campo}"
+        self.campo = campo
+        self.filtro = f"{campo}:[* TO *]"
+        self.impressao = impressao
+        self.novos = self.alterados = self.iguais = self.removidos = 0
+        self._alterados = set()
+        # True só quando continua a execução interrompida: fora disso, os documentos
+        # antes do offset do checkpoint não teriam a marca desta execução (ou teriam
+        # sido apagados do core) e quem chama precisa reler o corpus desde o início
+        self.retomada = False
+        # True quando a variante foi apagada e reindexada inteira nesta execução: só então
+        # o tempo de indexação é comparável com o das outras variantes
+        self.completa = False
+
+        with self.trava:
+            linha = self.conexao.execute("SELECT impressao, execucao, em_andamento, impressao_em_andamento "
+                                         "FROM escopos WHERE escopo = ?", (self.escopo,)).fetchone()
+        anterior, ultima, em_andamento, impressao_em_andamento = linha or (None, 0, None, None)
+        if retomando and em_andamento and impressao_em_andamento == impressao:
+            # Continuação de uma execução interrompida: mesma marca, nada é apagado de novo
+            self.execucao = em_andamento
+            self.retomada = True
+            return
+
+        self.execucao = max(ultima or 0, em_andamento or 0) + 1
+        if anterior != impressao:
+            motivo = "primeira execução incremental" if anterior is None else "análise ou schema mudou"
+            print(f"[{self.escopo}] 🔁 Reindexação completa ({motivo}).")
+            self.completa = True
+            cliente.delete(q=self.filtro)
+            with self.trava, self.conexao:
+                self.conexao.execute("DELETE FROM passagens WHERE escopo = ?", (self.escopo,))
+        with self.trava, self.conexao:
+            self.conexao.execute("INSERT OR REPLACE INTO escopos VALUES (?, ?, ?, ?, ?)",
+                                 (self.escopo, anterior, ultima, self.execucao, impressao))
+
+    def _hashes_salvos(self, ids):
+        salvos = {}
+        for i in range(0, len(ids), 500):
+            parte = ids[i:i + 500]
+            marcadores = ",".join("?" * len(parte))
+            salvos.update(self.conexao.execute(
+                f"SELECT passage_id, hash FROM passagens WHERE escopo = ? AND passage_id IN ({marcadores})",
+                [self.escopo] + parte))
+        return salvos
+
+    def classificar(self, lote):
+        # Devolve só os documentos novos ou alterados; todos os vistos recebem a marca desta
+        # execução (inclusive alterados cujo envio venha a falhar, para não serem removidos)
+        ids = [id_da_passagem(doc) for doc in lote]
+        hashes = [hash_conteudo(doc) for doc in lote]
+        with self.trava:
+            salvos = self._hashes_salvos(ids)
+            with self.conexao:
+                self.conexao.executemany("UPDATE passagens SET execucao = ? WHERE escopo = ? AND passage_id = ?",
+                                         [(self.execucao, self.escopo, i) for i in ids if i in salvos])
+            mudaram = []
+            for doc, i, h in zip(lote, ids, hashes):
+                salvo = salvos.get(i)
+                if salvo == h:
+                    self.iguais += 1
+                    continue
+                if salvo is None:
+                    self.novos += 1
+                else:
+                    self.alterados += 1
+                    self._alterados.add(i)
+                mudaram.append(doc)
+        return mudaram
+
+    def _excluir(self, ids):
+        for i in range(0, len(ids), IDS_POR_EXCLUSAO):
+            termos = " OR ".join(_frase(valor) for valor in ids[i:i + IDS_POR_EXCLUSAO])
+            self.cliente.delete(q=f"{self.filtro} AND passage_id:({termos})")
+
+    def enviar(self, lote, add):
+        # Os documentos levam a uniqueKey da variante (definir_ids), então reenvios os
+        # substituem. A versão antiga de um documento alterado ainda é apagada antes do add
+        # e os ids do lote ficam marcados até a confirmação, para cores cuja uniqueKey não
+        # seja 'id': se o add falhar depois de aplicado, a nova tentativa apaga essa cópia.
+        definir_ids(lote, self.campo)
+        ids = [id_da_passagem(doc) for doc in lote]
+        with self.trava:
+            antigos = [i for i in ids if i in self._alterados]
+            self._alterados.update(ids)
+        self._excluir(antigos)
+        add(lote)
+        registros = [(self.escopo, i, hash_conteudo(doc), self.execucao) for i, doc in zip(ids, lote)]
+        with self.trava:
+            with self.conexao:
+                self.conexao.executemany("INSERT OR REPLACE INTO passagens VALUES (?, ?, ?, ?)", registros)
+            self._alterados.difference_update(ids)
+
+    def concluir(self):
+        # Chamado depois da pipeline inteira: remove do core o que não apareceu no corpus
+        with self.trava:
+            removidos = [i for (i,) in self.conexao.execute(
+                "SELECT passage_id FROM passagens WHERE escopo = ? AND execucao != ?", (self.escopo, self.execucao))]
+        self._excluir(removidos)
+        self.removidos = len(removidos)
+        with self.trava, self.conexao:
+            self.conexao.execute("DELETE FROM passagens WHERE escopo = ? AND execucao != ?",
+                                 (self.escopo, self.execucao))
+            self.conexao.execute("UPDATE escopos SET impressao = ?, execucao = ?, em_andamento = NULL, "
+                                 "impressao_em_andamento = NULL WHERE escopo = ?",
+                                 (self.impressao, self.execucao, self.escopo))
+        print(f"[{self.escopo}] Δ {self.novos} novos, {self.alterados} alterados, {self.removidos} removidos, "
+              f"{self.iguais} sem mudança")
+
+    def resumo(self):
+        return {"novos": self.novos, "alterados": self.alterados, "removidos": self.removidos, "iguais": self.iguais,
+                "completa": self.completa}
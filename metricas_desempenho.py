@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+import time
+
+# Gravado no diretório de onde os scripts são executados, junto dos CSVs de resultados
+METRICAS_FILE = "metricas_desempenho.json"
+
+_trava = threading.Lock()
+
+
+def percentis(valores):
+    if not valores:
+        return {}
+    ordenados = sorted(valores)
+
+    def p(q):
+        return ordenados[min(len(ordenados) - 1, int(round(q * (len(ordenados) - 1))))]
+
+    return {"p50": p(0.50), "p95": p(0.95), "p99": p(0.99),
+            "media": sum(ordenados) / len(ordenados), "max": ordenados[-1]}
+
+
+def carregar_metricas(arquivo=METRICAS_FILE):
+    if not os.path.exists(arquivo):
+        return {}
+    with open(arquivo, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def registrar_metricas(chave, dados, arquivo=METRICAS_FILE):
+    # chave: "indexacao/<variante>" ou "consulta/<arquivo de resultados>"
+    with _trava:
+        metricas = carregar_metricas(arquivo)
+        metricas[chave] = dict(dados, registrado_em=time.strftime("%Y-%m-%d %H:%M:%S"))
+        temporario = f"{arquivo}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(metricas, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, arquivo)
+
+
+def chave_indexacao(variante, completa=True):
+    # Execuções incrementais (ou retomadas) enviam só parte do corpus: o tempo delas fica
+    # numa chave própria para não substituir o da indexação completa lida pelos comparadores
+    return f"indexacao/{variante}" if completa else f"indexacao_incremental/{variante}"
+
+
+# ---- Leitura para os comparadores ----
+def variante_do_arquivo(arquivo_resultados):
+    # "resultados_com_stem.csv" -> "com_stem"
+    nome = os.path.splitext(os.path.basename(arquivo_resultados))[0]
+    return nome[len("resultados_"):] if nome.startswith("resultados_") else nome
+
+
+def desempenho_da_execucao(arquivo_resultados, metricas=None):
+    metricas = carregar_metricas() if metricas is None else metricas
+    indexacao = metricas.get(f"indexacao/{variante_do_arquivo(arquivo_resultados)}", {})
+    consulta = metricas.get(f"consulta/{os.path.basename(arquivo_resultados)}", {})
+    return {
+        "tempo_index": indexacao.get("tempo_total"),
+        "docs_por_segundo": indexacao.get("docs_por_segundo"),
+        "tempo_consulta": consulta.get("tempo_total"),
+        "qps": consulta.get("qps"),
+        "latencia_p95": consulta.get("latencia_ms", {}).get("p95"),
+        "qtime_p95": consulta.get("qtime_ms", {}).get("p95"),
+    }
+
+
+def formatar(valor, unidade="s"):
+    return "não registrado" if valor is None else f"{valor:.2f}{unidade}"
+
+
+def diferenca(com, sem, unidade="s"):
+    return "n/d" if com is None or sem is None else f"{sem - com:.2f}{unidade}"
@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+
+from instrumentacao import Cronometro
+from checkpoint_indexacao import TENTATIVAS, com_retentativas, repetivel
+
+NUM_ENVIOS = 4         # Threads enviando lotes ao Solr ao mesmo tempo
+TAMANHO_FILA = 4       # Lotes aguardando entre uma etapa e a próxima
+
+_FIM = object()
+
+
+def _colocar(fila, item, parar):
+    while not parar.is_set():
+        try:
+            fila.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _retirar(fila, parar):
+    while not parar.is_set():
+        try:
+            return fila.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return _FIM
+
+
+# ---- Pipeline leitura -> análise -> envio ----
+def indexar_em_pipeline(lotes, analisar, enviar, rotulo, num_analisadores=1,
+                        num_envios=NUM_ENVIOS, tamanho_fila=TAMANHO_FILA, cronometro=None,
+                        checkpoint=None, tentativas=TENTATIVAS, controlador=None):
+    # As filas limitadas dão o backpressure: se o Solr estiver lento, a análise
+    # e a leitura param de produzir em vez de acumular lotes na memória.
+    # Com checkpoint, 'lotes' deve começar em checkpoint.offset (ver carregar_lotes(pular=...)).
+    # O controlador (ajuste_lotes.ControladorEnvio) recebe a latência e a espera de cada envio
+    fila_analise = queue.Queue(maxsize=tamanho_fila)
+    fila_envio = queue.Queue(maxsize=tamanho_fila)
+    parar = threading.Event()
+    erros = []
+
+    # Sem cronômetro do chamador, o relatório por etapa é impresso aqui mesmo
+    relatar = cronometro is None
+    cronometro = cronometro or Cronometro(rotulo)
+    cronometro.trabalhadores.update({"leitura": 1, "análise": num_analisadores, "envio": num_envios})
+    total = [0]
+    trava_total = threading.Lock()
+
+    def protegido(funcao):
+        def executar():
+            try:
+                funcao()
+            except BaseException as e:
+                erros.append(e)
+                parar.set()
+        return executar
+
+    def ler():
+        iterador = iter(lotes)
+        numero = 0
+        inicio_lote = checkpoint.offset if checkpoint else 0
+        while True:
+            inicio = time.perf_counter()
+            lote = next(iterador, _FIM)
+            if lote is _FIM:
+                break
+            numero += 1
+            cronometro.registrar("leitura", time.perf_counter() - inicio, len(lote), lote=numero)
+            # A faixa do corpus é fixada aqui: a análise pode descartar documentos do lote
+            if not _colocar(fila_analise, (numero, inicio_lote, inicio_lote + len(lote), lote), parar):
+                return
+            inicio_lote += len(lote)
+        for _ in range(num_analisadores):
+            _colocar(fila_analise, _FIM, parar)
+
+    def analisar_lotes():
+        while True:
+            item = _retirar(fila_analise, parar)
+            if item is _FIM:
+                return
+            numero, inicio_lote, fim_lote, lote = item
+            if analisar:  # None: a análise já foi feita nos processos leitores
+                lote = cronometro.medir("análise", analisar, lote, numero)
+            if not _colocar(fila_envio, (numero, inicio_lote, fim_lote, lote), parar):
+                return
+
+    def enviar_lotes():
+        while True:
+            inicio_espera = time.perf_counter()
+            item = _retirar(fila_envio, parar)
+            if item is _FIM:
+                return
+            numero, inicio_lote, fim_lote, lote = item
+            espera = time.perf_counter() - inicio_espera
+            if not lote:  # nada mudou neste trecho do corpus (indexação incremental)
+                cronometro.resumo_lote(numero)
+                if checkpoint:
+                    checkpoint.confirmar(inicio_lote, fim_lote)
+                continue
+
+            def avisar(tentativa, erro, segundos):
+                if controlador:
+                    controlador.falhou()
+                print(f"[{rotulo}] ⚠️ Lote {numero} falhou ({erro}); tentativa {tentativa + 1} em {segundos:.1f}s")
+
+            def enviar_com_retentativas(lote):
+                return com_retentativas(enviar, lote, tentativas=tentativas, ao_repetir=avisar)
+
+            inicio_envio = time.perf_counter()
+            try:
+                cronometro.medir("envio", enviar_com_retentativas, lote, numero)
+            except Exception as e:
+                if controlador and repetivel(e):
+                    controlador.falhou()
+                cronometro.resumo_lote(numero)
+                print(f"[{rotulo}] ❌ Erro ao indexar lote {numero}: {e}")
+                if checkpoint:
+                    checkpoint.falhou(inicio_lote, fim_lote, lote, e)
+                continue
+            if checkpoint:
+                checkpoint.confirmar(inicio_lote, fim_lote)
+            if controlador:
+                controlador.observar(lote, time.perf_counter() - inicio_envio, espera)
+            with trava_total:
+                total[0] += len(lote)
+                print(f"[{rotulo}] {total[0]} documentos indexados... ({cronometro.resumo_lote(numero)})")
+
+    leitor = threading.Thread(target=protegido(ler), name="leitura", daemon=True)
+    analisadores = [threading.Thread(target=protegido(analisar_lotes), name=f"analise-{i}", daemon=True)
+                    for i in range(num_analisadores)]
+    enviadores = [threading.Thread(target=protegido(enviar_lotes), name=f"envio-{i}", daemon=True)
+                  for i in range(num_envios)]
+    try:
+        for thread in [leitor] + analisadores + enviadores:
+            thread.start()
+
+        leitor.join()
+        for thread in analisadores:
+            thread.join()
+        for _ in range(num_envios):
+            _colocar(fila_envio, _FIM, parar)
+        for thread in enviadores:
+            thread.join()
+    finally:
+        # Leitores paralelos (leitor_corpus.LotesEmParalelo) ou geradores interrompidos no meio
+        fechar = getattr(lotes, "close", None)
+        if fechar:
+            fechar()
+
+    if erros:
+        raise erros[0]
+
+    if relatar:
+        cronometro.relatorio()
+    return total[0]
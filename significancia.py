@@ -0,0 +1,120 @@
+import multiprocessing
+
+import numpy as np
+from scipy.stats import ttest_rel
+
+REAMOSTRAS = 10000
+CONFIANCA = 0.95
+ELEMENTOS_POR_BLOCO = 1 << 22  # reamostras x consultas geradas por vez (limita a memória)
+MIN_POR_PROCESSO = 1 << 24     # abaixo disso, abrir processos custa mais do que calcular
+
+
+# ---- Blocos de reamostragem (executados no processo atual ou nos do pool) ----
+def _bloco_aleatorizacao(args):
+    # Sign-flip pareado: trocar os rótulos de uma consulta inverte o sinal da sua diferença
+    semente, linhas, diferencas, observado = args
+    rng = np.random.default_rng(semente)
+    trocas = rng.random((linhas, diferencas.shape[0])) < 0.5
+    medias = (diferencas.sum(axis=0) - 2 * (trocas @ diferencas)) / diferencas.shape[0]
+    return (np.abs(medias) >= np.abs(observado) - 1e-12).sum(axis=0)
+
+
+def _bloco_bootstrap(args):
+    semente, linhas, diferencas = args
+    rng = np.random.default_rng(semente)
+    indices = rng.integers(0, diferencas.shape[0], size=(linhas, diferencas.shape[0]))
+    return diferencas[indices].mean(axis=1)
+
+
+def _blocos(reamostras, n, semente, *extra):
+    # Sementes fixas por bloco (SeedSequence.spawn): o resultado não depende de
+    # quantos processos executam os blocos
+    por_bloco = max(1, ELEMENTOS_POR_BLOCO // max(n, 1))
+    tamanhos = [min(por_bloco, reamostras - i) for i in range(0, reamostras, por_bloco)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    return [(s, linhas) + extra for s, linhas in zip(sementes, tamanhos)]
+
+
+def _executar(funcao, tarefas, processos):
+    if processos is None:
+        total = sum(t[1] for t in tarefas) * tarefas[0][2].size if tarefas else 0
+        processos = min(len(tarefas), multiprocessing.cpu_count(), max(1, total // MIN_POR_PROCESSO))
+    if processos <= 1:
+        return [funcao(t) for t in tarefas]
+    with multiprocessing.Pool(processes=processos) as pool:
+        return pool.map(funcao, tarefas)
+
+
+# ---- Testes ----
+def teste_aleatorizacao(a, b, reamostras=REAMOSTRAS, semente=0, processos=None):
+    # p bilateral do teste de aleatorização pareado para a média de a - b.
+    # a e b: valores por consulta, vetores (n) ou matrizes (n x métricas)
+    diferencas = np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64)
+    matriz = diferencas.reshape(len(diferencas), -1)
+    observado = matriz.mean(axis=0)
+    contagens = _executar(_bloco_aleatorizacao, _blocos(reamostras, len(matriz), semente, matriz, observado),
+                          processos)
+    p = (np.sum(contagens, axis=0) + 1) / (reamostras + 1)
+    return p.reshape(diferencas.shape[1:])
+
+
+def bootstrap_ic(a, b, reamostras=REAMOSTRAS, confianca=CONFIANCA, semente=0, processos=None):
+    # Intervalo de confiança (percentil) da média de a - b, reamostrando consultas
+    diferencas = np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64)
+    matriz = diferencas.reshape(len(diferencas), -1)
+    medias = np.concatenate(_executar(_bloco_bootstrap, _blocos(reamostras, len(matriz), semente, matriz),
+                                      processos))
+    alfa = (1 - confianca) / 2
+    inferior, superior = np.quantile(medias, [alfa, 1 - alfa], axis=0)
+    return inferior.reshape(diferencas.shape[1:]), superior.reshape(diferencas.shape[1:])
+
+
+def testes_pareados(a, b, reamostras=REAMOSTRAS, confianca=CONFIANCA, semente=0, processos=None):
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    t_stat, p_t = ttest_rel(a, b)
+    inferior, superior = bootstrap_ic(a, b, reamostras, confianca, semente, processos)
+    return {
+        "delta": (a - b).mean(axis=0),
+        "t": t_stat,
+        "p_t": p_t,
+        "p_aleatorizacao": teste_aleatorizacao(a, b, reamostras, semente, processos),
+        "ic": (inferior, superior),
+        "confianca": confianca,
+        "reamostras": reamostras,
+    }
+
+
+def holm(p):
+    # p-valores ajustados por Holm-Bonferroni (controla a taxa de erro da família de comparações)
+    p = np.asarray(p, dtype=np.float64)
+    ordem = np.argsort(p)
+    ajustados = np.maximum.accumulate((len(p) - np.arange(len(p))) * p[ordem])
+    resultado = np.empty_like(p)
+    resultado[ordem] = np.minimum(ajustados, 1.0)
+    return resultado
+
+
+def comparar(metricas_a, metricas_b, medidas=("AP", "nDCG@10"), **opcoes):
+    # Testes pareados sobre a saída de avaliacao_vetorizada.avaliar para duas execuções,
+    # nas consultas em comum; todas as medidas usam as mesmas reamostras
+    comuns, ia, ib = np.intersect1d(metricas_a["consultas"], metricas_b["consultas"], return_indices=True)
+    a = np.column_stack([metricas_a[m][ia] for m in medidas])
+    b = np.column_stack([metricas_b[m][ib] for m in medidas])
+    resultado = testes_pareados(a, b, **opcoes)
+    por_medida = {}
+    for j, medida in enumerate(medidas):
+        por_medida[medida] = {
+            "media_a": float(a[:, j].mean()), "media_b": float(b[:, j].mean()),
+            "delta": float(resultado["delta"][j]),
+            "t": float(resultado["t"][j]), "p_t": float(resultado["p_t"][j]),
+            "p_aleatorizacao": float(resultado["p_aleatorizacao"][j]),
+            "ic": (float(resultado["ic"][0][j]), float(resultado["ic"][1][j])),
+        }
+    return {"consultas": comuns, "confianca": resultado["confianca"], "reamostras": resultado["reamostras"],
+            "medidas": por_medida}
+
+
+def formatar_teste(nome, r, confianca=CONFIANCA):
+    return (f"{nome}: Δ = {r['delta']:+.4f} | IC {confianca:.0%} [{r['ic'][0]:+.4f}, {r['ic'][1]:+.4f}] | "
+            f"p (aleatorização) = {r['p_aleatorizacao']:.4f} | p (teste t) = {r['p_t']:.4f}")
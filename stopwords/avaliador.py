@@ -1,67 +1,31 @@
-import csv
-from collections import defaultdict
 from scipy.stats import ttest_rel
+import numpy as np
+import os
+import sys
 
-def carregar_qrels(arquivo_qrels):
-    qrels = defaultdict(dict)
-    with open(arquivo_qrels, 'r', encoding='utf-8') as f:
-        for linha in f:
-            parts = linha.strip().split()
-            if len(parts) == 4:
-                consulta_id = int(parts[0])
-                doc_id = parts[2]
-                relevancia = int(parts[3])
-                qrels[consulta_id][doc_id] = relevancia
-    return qrels
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from avaliacao_vetorizada import avaliar
+from cache_avaliacao import carregar_execucao_cache, carregar_qrels_cache
+from significancia import comparar, formatar_teste
 
-def carregar_resultados(path_csv):
-    resultados = defaultdict(list)
-    with open(path_csv, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            consulta_id = int(row['número_da_consulta'])
-            doc_id_raw = row['número_do_documento']
-            doc_id = doc_id_raw.strip().strip("[]").replace("'", "").replace('"', "")
-            score = float(row['score'])
-            resultados[consulta_id].append((doc_id, score))
-    return resultados
-
-def calcular_ap(documentos_ranqueados, relevantes):
-    acertos = 0
-    soma_precisao = 0.0
-    total_relevantes = sum(1 for r in relevantes.values() if r > 0)
-    for i, (doc_id, _) in enumerate(documentos_ranqueados, start=1):
-        relevancia = relevantes.get(doc_id, 0)
-        if relevancia > 0:
-            acertos += 1
-            precisao = acertos / i
-            soma_precisao += precisao
-    if total_relevantes == 0:
-        return 0.0
-    return soma_precisao / total_relevantes
-
-def calcular_aps(resultados, qrels):
-    aps = []
-    for consulta_id in resultados:
-        relevantes = qrels.get(consulta_id, {})
-        if not relevantes:
-            continue
-        ap = calcular_ap(resultados[consulta_id], relevantes)
-        aps.append((consulta_id, ap))
-    return aps
+def calcular_aps(metricas):
+    # Sem nenhuma consulta avaliada, avaliar() não devolve a chave "AP"
+    return list(zip(metricas["consultas"].tolist(), np.asarray(metricas.get("AP", ())).tolist()))
 
 # === Arquivos ===
 arquivo_com_stop = "resultados_com_stop.csv"
-arquivo_sem_stop = "resultados_sem_stem.csv"
+arquivo_sem_stop = "resultados.csv"  # execução base (pesquisa.py), sem filtro de stopwords
 arquivo_qrels = "quati_1M_qrels.txt"
 
 # === Execução ===
-qrels = carregar_qrels(arquivo_qrels)
-res_com = carregar_resultados(arquivo_com_stop)
-res_sem = carregar_resultados(arquivo_sem_stop)
+qrels = carregar_qrels_cache(arquivo_qrels)
+res_com = carregar_execucao_cache(arquivo_com_stop)
+res_sem = carregar_execucao_cache(arquivo_sem_stop)
 
-aps_com = calcular_aps(res_com, qrels)
-aps_sem = calcular_aps(res_sem, qrels)
+metricas_com = avaliar(res_com, qrels)
+metricas_sem = avaliar(res_sem, qrels)
+aps_com = calcular_aps(metricas_com)
+aps_sem = calcular_aps(metricas_sem)
 
 # === Alinhar por consultas em comum ===
 consultas_comuns = set(consulta for consulta, _ in aps_com) & set(consulta for consulta, _ in aps_sem)
@@ -70,6 +34,8 @@ aps_sem_dict = dict(aps_sem)
 
 aps_com_vals = [aps_com_dict[c] for c in consultas_comuns]
 aps_sem_vals = [aps_sem_dict[c] for c in consultas_comuns]
+if not consultas_comuns:
+    sys.exit("❌ Nenhuma consulta avaliada em comum entre as execuções")
 
 # === Calcular MAP ===
 map_com = sum(aps_com_vals) / len(aps_com_vals)
@@ -78,6 +44,9 @@ map_sem = sum(aps_sem_vals) / len(aps_sem_vals)
 # === Teste T pareado ===
 t_stat, p_value = ttest_rel(aps_com_vals, aps_sem_vals)
 
+# === Aleatorização pareada e bootstrap (MAP e nDCG@10, sem - com) ===
+significancia = comparar(metricas_sem, metricas_com)
+
 # === Resultado final ===
 print("\n📊 COMPARAÇÃO COM STOPWORDS")
 print("-" * 40)
@@ -92,4 +61,7 @@ if p_value < 0.05:
     print("✅ Diferença estatisticamente significativa (p < 0.05)")
 else:
     print("❌ Diferença não significativa (p ≥ 0.05)")
- 
\ No newline at end of file
+print()
+print(f"🎲 Aleatorização pareada e bootstrap ({significancia['reamostras']} reamostras, sem - com)")
+for medida, nome in (("AP", "MAP"), ("nDCG@10", "nDCG@10")):
+    print("   " + formatar_teste(nome, significancia["medidas"][medida], significancia["confianca"]))
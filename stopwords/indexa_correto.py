@@ -1,47 +1,81 @@
-import pysolr
-import json
 import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from leitor_corpus import carregar_lotes, preferir_jsonl
+from pipeline_indexacao import indexar_em_pipeline
+from instrumentacao import Cronometro, instrumentar_cliente
+from cliente_solr import ClienteSolrJSON
+from metricas_desempenho import chave_indexacao, registrar_metricas
+from checkpoint_indexacao import Checkpoint
+from ajuste_lotes import ControladorEnvio
+from manifesto_indexacao import Manifesto, impressao_analise
 
 # Configurações
 SOLR_URL = 'http://localhost:8983/solr/exemplo_stopwords'
 JSON_FILE = 'quati_1M_passages.json'
-BATCH_SIZE = 1000
+BATCH_SIZE = 1000      # Tamanho inicial do lote de envio; ajustado durante a execução (ajuste_lotes.py)
+PERFIL_LOTE = None     # Número de um lote para perfilar com cProfile (None = desligado)
+
+solr = ClienteSolrJSON(SOLR_URL, timeout=60)
 
-solr = pysolr.Solr(SOLR_URL, timeout=60)
+def preparar_lote(lote):
+    for doc in lote:
+        passage_text = doc.get('passage', '')
+        passage_id = doc.get('passage_id', '')
+        doc['passage_id'] = passage_id
+        doc['texto_com_stop'] = passage_text  # Só indexa neste campo
+    return lote
 
-def carregar_json_em_lotes(caminho_arquivo, batch_size):
-    with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-        documentos = json.load(f)
-        for i in range(0, len(documentos), batch_size):
-            yield documentos[i:i + batch_size]
+def enviar_lote(lote):
+    solr.add(lote, commit=False)
 
 def indexar():
-    total = 0
     start_time = time.time()
+    cronometro = Cronometro("com_stop", perfil_lote=PERFIL_LOTE)
+    instrumentar_cliente(solr, cronometro)
+
+    # Leitura, preparo e envio rodam em paralelo (ver pipeline_indexacao.py);
+    # o checkpoint permite retomar uma execução interrompida. Com o corpus em JSONL
+    # (converter_jsonl.py), processos leem e preparam faixas do arquivo ao mesmo tempo.
+    corpus = preferir_jsonl(JSON_FILE)
+    checkpoint = Checkpoint("com_stop", corpus)
+    ajuste = ControladorEnvio(BATCH_SIZE, rotulo="com_stop")
+
+    # Indexação incremental: só passagens novas ou alteradas desde a última execução
+    # (ou todas, se o schema do campo mudou) vão para o Solr
+    manifesto = Manifesto()
+    delta = manifesto.delta(solr, "texto_com_stop", impressao_analise(solr, {"texto_com_stop": "passage"}),
+                            retomando=checkpoint.offset > 0)
+    if checkpoint.offset and not delta.retomada:
+        checkpoint.reiniciar("execução anterior não pode ser continuada pelo manifesto")
+    lotes = carregar_lotes(corpus, ajuste, pular=checkpoint.offset, analisar=preparar_lote)
 
-    for lote in carregar_json_em_lotes(JSON_FILE, BATCH_SIZE):
-        for doc in lote:
-            passage_text = doc.get('passage', '')
-            passage_id = doc.get('passage_id', '')
-            doc['passage_id'] = passage_id
-            doc['texto_com_stop'] = passage_text  # Só indexa neste campo
+    def enviar_delta(lote):
+        delta.enviar(lote, enviar_lote)
 
-        try:
-            solr.add(lote, commit=False)
-            total += len(lote)
-            print(f"[com_stop] {total} documentos indexados...")
-        except Exception as e:
-            print(f"[com_stop] ❌ Erro ao indexar lote: {e}")
+    total = indexar_em_pipeline(lotes, delta.classificar, enviar_delta, rotulo="com_stop", cronometro=cronometro,
+                                checkpoint=checkpoint, controlador=ajuste)
+    delta.concluir()
+    manifesto.fechar()
 
     try:
-        solr.commit()
+        with cronometro.etapa("commit"):
+            solr.commit()
+        checkpoint.concluir()
         print(f"[com_stop] ✅ Commit final realizado.")
     except Exception as e:
         print(f"[com_stop] ❌ Erro no commit final: {e}")
 
+    cronometro.relatorio()
     tempo_total = time.time() - start_time
     print(f"\n⏱️ Tempo de indexação: {tempo_total:.2f} segundos")
+    registrar_metricas(chave_indexacao("com_stop", delta.completa),
+                       {"solr_url": SOLR_URL, "docs": total, "tempo_total": tempo_total,
+                        "docs_por_segundo": total / tempo_total, "delta": delta.resumo()})
 
 # Executar
-print("🔄 Iniciando indexação COM stopwords...")
-indexar()
+if __name__ == "__main__":
+    print("🔄 Iniciando indexação COM stopwords...")
+    indexar()